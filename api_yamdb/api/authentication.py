@@ -0,0 +1,98 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from reviews.metrics import metrics
+
+# Поля пользователя в кеше: только нужные для прав доступа, без
+# пароля и личных данных; остальные поля загрузятся при обращении.
+USER_CACHE_FIELDS = ('id', 'username', 'role', 'is_superuser', 'is_active')
+
+
+def endpoint_basename(request):
+    """basename вьюсета из router_v1 или имя маршрута для прочих view."""
+    view = request.parser_context.get('view')
+    basename = getattr(view, 'basename', None)
+    if basename:
+        return basename
+    match = request._request.resolver_match
+    return match.url_name if match else ''
+
+
+def user_cache():
+    return caches[settings.AUTH_USER_CACHE]
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def user_version_key(user_id):
+    return f'auth:user:{user_id}:version'
+
+
+def forget_user(user_id):
+    """
+    Новая метка версии пользователя после фиксации транзакции: запись
+    кеша с прежней меткой, даже сохраненная позже, не читается.
+    """
+    transaction.on_commit(lambda: user_cache().set(
+        user_version_key(user_id), uuid4().hex, None
+    ))
+
+
+def cached_user(data):
+    """Пользователь из записи кеша с отложенными прочими полями."""
+    User = get_user_model()
+    fields = [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in data
+    ]
+    return User.from_db(
+        DEFAULT_DB_ALIAS, fields, [data[name] for name in fields]
+    )
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по JWT с пользователем из кеша
+    settings.AUTH_USER_CACHE: таблица пользователей читается только
+    при промахе, проверки активности и токена выполняет simplejwt.
+    Запись хранит поля USER_CACHE_FIELDS и метку версии пользователя,
+    прочитанную до запроса к базе.
+    """
+
+    def authenticate(self, request):
+        self.basename = endpoint_basename(request)
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        cache = user_cache()
+        key, version_key = user_cache_key(user_id), user_version_key(user_id)
+        found = cache.get_many((key, version_key))
+        entry, version = found.get(key), found.get(version_key)
+        if (
+            entry is not None and version is not None
+            and entry['version'] == version
+        ):
+            metrics.incr('users', 'hits', self.basename)
+            return cached_user(entry)
+        metrics.incr('users', 'misses', self.basename)
+        if version is None:
+            cache.add(version_key, uuid4().hex, None)
+            version = cache.get(version_key)
+        user = super().get_user(validated_token)
+        entry = {name: getattr(user, name) for name in USER_CACHE_FIELDS}
+        cache.set(
+            key, {**entry, 'version': version},
+            settings.AUTH_USER_CACHE_TIMEOUT
+        )
+        return user
@@ -0,0 +1,302 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from time import monotonic, perf_counter, time_ns
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.http import Http404, HttpRequest
+from django.shortcuts import get_object_or_404
+from django.urls import resolve
+
+from reviews.metrics import metrics
+from reviews.registry import categories, genres
+
+# Отметка внутреннего запроса фоновой пересборки ответа.
+REVALIDATE_ATTR = 'response_cache_revalidate'
+
+logger = logging.getLogger(__name__)
+
+
+def title_cache_key(title):
+    """
+    Ключ представления произведения: меняется вместе с версией
+    произведения и версиями справочников жанров и категорий.
+    """
+    return (
+        f'title:{title.pk}:{title.version}:'
+        f'{categories.version}:{genres.version}'
+    )
+
+
+def cached_representations(objects, key_func, render_many, basename=''):
+    """
+    Представления объектов из кеша settings.TITLE_REPRESENTATION_CACHE.
+    Промахи рендерятся одной пачкой через render_many и сохраняются.
+    """
+    cache = caches[settings.TITLE_REPRESENTATION_CACHE]
+    keys = [key_func(obj) for obj in objects]
+    found = cache.get_many(keys)
+    missing = [
+        (key, obj) for key, obj in zip(keys, objects) if key not in found
+    ]
+    metrics.incr('representations', 'hits', basename, len(found))
+    metrics.incr('representations', 'misses', basename, len(missing))
+    if missing:
+        started = perf_counter()
+        fresh = dict(zip(
+            (key for key, _ in missing),
+            render_many([obj for _, obj in missing])
+        ))
+        metrics.timing(
+            'representations', 'render_ms', basename,
+            (perf_counter() - started) * 1000
+        )
+        cache.set_many(fresh, settings.TITLE_REPRESENTATION_TIMEOUT)
+        found.update(fresh)
+    return [found[key] for key in keys]
+
+
+def tag_store():
+    return caches[settings.RESPONSE_CACHE_TAGS]
+
+
+def tag_version_key(tag):
+    return f'tag:{tag}'
+
+
+def initial_tag_version():
+    # Метка, заново созданная после потери ключа, не совпадет с прежней.
+    return time_ns() // 1000
+
+
+def tag_versions(tags):
+    """Метки версий тегов; для новых тегов метки создаются."""
+    store = tag_store()
+    keys = {tag: tag_version_key(tag) for tag in tags}
+    found = store.get_many(keys.values())
+    for tag, key in keys.items():
+        if key not in found:
+            store.add(key, initial_tag_version(), None)
+            found[key] = store.get(key)
+    return {tag: found[key] for tag, key in keys.items()}
+
+
+def purge_tags(tags):
+    """
+    Увеличивает метки версий тегов после фиксации транзакции: ключи
+    ответов включают метки, и ответы с прежними метками больше не
+    читаются.
+    """
+    tags = set(tags)
+
+    def bump():
+        store = tag_store()
+        for tag in tags:
+            key = tag_version_key(tag)
+            try:
+                store.incr(key)
+            except ValueError:
+                store.add(key, initial_tag_version(), None)
+
+    if tags:
+        transaction.on_commit(bump)
+
+
+def response_cache_key(request, versions):
+    """
+    Ключ ответа: путь, параметры в порядке имен, формат и метки
+    версий тегов ответа.
+    """
+    query = '&'.join(
+        f'{name}={value}'
+        for name, values in sorted(request.query_params.lists())
+        for value in values
+    )
+    fingerprint = '|'.join((
+        request.get_host(),
+        request.path,
+        query,
+        request.accepted_renderer.format,
+        *(f'{tag}={version}' for tag, version in sorted(versions.items())),
+    ))
+    return f'response:{hashlib.md5(fingerprint.encode()).hexdigest()}'
+
+
+def response_cache():
+    return caches[settings.RESPONSE_CACHE]
+
+
+def revalidation_request(request):
+    """
+    Копия GET-запроса для фоновой пересборки: путь, параметры и META
+    исходного запроса без условных заголовков, чтобы ответ собрался
+    полностью.
+    """
+    internal = HttpRequest()
+    internal.method = 'GET'
+    internal.path = request.path
+    internal.path_info = request.path_info
+    internal.GET = request.GET.copy()
+    internal.META = {
+        name: value for name, value in request.META.items()
+        if not name.startswith('HTTP_IF_')
+    }
+    setattr(internal, REVALIDATE_ATTR, True)
+    return internal
+
+
+def revalidate_response(request, lock_key, basename):
+    """
+    Пересобирает закешированный ответ в фоновом потоке повторным
+    анонимным запросом к тому же адресу и снимает блокировку.
+    Ошибки пересборки пишутся в лог и метрики.
+    """
+    internal = revalidation_request(request)
+
+    def revalidate():
+        started = perf_counter()
+        try:
+            match = resolve(internal.path_info)
+            response = match.func(internal, *match.args, **match.kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            if response.status_code != 200:
+                metrics.incr('responses', 'revalidation_errors', basename)
+        except Exception:
+            metrics.incr('responses', 'revalidation_errors', basename)
+            logger.exception(
+                'Ошибка фоновой пересборки ответа %s', internal.path
+            )
+        finally:
+            metrics.timing(
+                'responses', 'revalidation_ms', basename,
+                (perf_counter() - started) * 1000
+            )
+            response_cache().delete(lock_key)
+            connections.close_all()
+
+    thread = threading.Thread(target=revalidate, daemon=True)
+    thread.start()
+    return thread
+
+
+class NegativeCache:
+    """
+    Ключи отсутствующих в базе объектов в памяти процесса: LRU на
+    settings.NEGATIVE_CACHE_SIZE записей со сроком жизни
+    settings.NEGATIVE_CACHE_TIMEOUT. Повторный 404 отдается без запроса
+    к базе. Запись хранит метку версии из общего кеша
+    settings.NEGATIVE_CACHE_VERSIONS, прочитанную до запроса к базе;
+    создание объекта меняет метку (discard), и записи этого кеша
+    перестают действовать во всех процессах. Счетчики пишутся в
+    метрики слоя missing_<name> с basename эндпоинта.
+    """
+
+    COUNTERS = ('hits', 'misses', 'stored', 'evicted', 'expired', 'cleared')
+
+    def __init__(self, name, basename):
+        self.name = name
+        self.layer = f'missing_{name}'
+        self.basename = basename
+        self.version_key = f'missing:{name}:version'
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def incr(self, counter):
+        metrics.incr(self.layer, counter, self.basename)
+
+    @property
+    def versions(self):
+        return caches[settings.NEGATIVE_CACHE_VERSIONS]
+
+    def current_version(self):
+        version = self.versions.get(self.version_key)
+        if version is None:
+            self.versions.add(self.version_key, uuid4().hex, None)
+            version = self.versions.get(self.version_key)
+        return version
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= monotonic():
+                del self._entries[key]
+                self.incr('expired')
+                entry = None
+        if entry is not None and entry[1] != self.current_version():
+            # Объект мог быть создан в другом процессе.
+            with self._lock:
+                self._entries.pop(key, None)
+            self.incr('cleared')
+            entry = None
+        if entry is None:
+            self.incr('misses')
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        self.incr('hits')
+        return True
+
+    def add(self, key, version=None):
+        """Запоминает ключ; version - метка, прочитанная до запроса."""
+        if version is None:
+            version = self.current_version()
+        with self._lock:
+            self._entries[key] = (
+                monotonic() + settings.NEGATIVE_CACHE_TIMEOUT, version
+            )
+            self._entries.move_to_end(key)
+            self.incr('stored')
+            while len(self._entries) > settings.NEGATIVE_CACHE_SIZE:
+                self._entries.popitem(last=False)
+                self.incr('evicted')
+
+    def discard(self, key):
+        """Меняет общую метку после фиксации транзакции, создавшей объект."""
+        def discard():
+            self.versions.set(self.version_key, uuid4().hex, None)
+            with self._lock:
+                if self._entries.pop(key, None) is not None:
+                    self.incr('cleared')
+
+        transaction.on_commit(discard)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def check(self, key):
+        """404 без запроса к базе, если объект недавно не нашелся."""
+        if key in self:
+            raise Http404
+
+    def get_object_or_404(self, key, queryset, **lookup):
+        self.check(key)
+        version = self.current_version()
+        try:
+            return get_object_or_404(queryset, **lookup)
+        except Http404:
+            self.add(key, version)
+            raise
+
+    def stats(self):
+        """Размер и счетчики этого процесса."""
+        counters = metrics.snapshot()['counters']
+        with self._lock:
+            size = len(self._entries)
+        return {
+            'size': size,
+            **{
+                name: counters.get((self.layer, self.basename, name), 0)
+                for name in self.COUNTERS
+            },
+        }
+
+
+missing_titles = NegativeCache('titles', basename='reviews')
+missing_reviews = NegativeCache('reviews', basename='comments')
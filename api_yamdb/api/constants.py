@@ -5,3 +5,4 @@ EMAIL_MAX_LENGTH = 254
 CHARFIELD_MAX_LENGTH = 150
 SCORE_MAX_VALUE = 10
 SCORE_MIN_VALUE = 1
+SCORE_PERCENTILES = (10, 25, 75, 90)
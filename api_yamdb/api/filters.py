@@ -1,22 +1,192 @@
+from functools import reduce
+from operator import or_
+
+from django.db.models import Count, F, IntegerField, Q
+from django.db.models.functions import Cast
 from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
 
 from reviews.models import Title
+from reviews.search import search_titles
+
+GENRE_MODES = (
+    ('any', 'Хотя бы один из жанров'),
+    ('all', 'Все перечисленные жанры'),
+)
+SLUG_MATCHES = (
+    ('exact', 'Точное совпадение slug'),
+    ('contains', 'Поиск подстроки в slug'),
+)
+
+
+class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+    """Фильтр по списку значений через запятую."""
 
 
 class TitleFilter(filters.FilterSet):
-    category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains'
+    """
+    Фильтры произведений.
+    genre и category принимают один или несколько slug через запятую
+    и сравнивают их точно; genre_mode=all требует все жанры сразу,
+    slug_match=contains включает прежний поиск по подстроке.
+    """
+
+    category = CharInFilter(method='filter_category')
+    genre = CharInFilter(method='filter_genre')
+    genre_mode = filters.ChoiceFilter(
+        choices=GENRE_MODES, method='filter_noop'
+    )
+    slug_match = filters.ChoiceFilter(
+        choices=SLUG_MATCHES, method='filter_noop'
+    )
+    name = filters.CharFilter(method='filter_name')
+    year_min = filters.NumberFilter(
+        field_name='year',
+        lookup_expr='gte'
+    )
+    year_max = filters.NumberFilter(
+        field_name='year',
+        lookup_expr='lte'
     )
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains'
+    decade = filters.NumberFilter(method='filter_decade')
+    rating_min = filters.NumberFilter(
+        field_name='rating',
+        lookup_expr='gte'
     )
-    name = filters.CharFilter(
-        field_name='name',
-        lookup_expr='icontains'
+    rating_max = filters.NumberFilter(
+        field_name='rating',
+        lookup_expr='lte'
+    )
+    reviews_min = filters.NumberFilter(
+        field_name='review_count',
+        lookup_expr='gte'
     )
 
     class Meta:
         model = Title
-        fields = ('name', 'year', 'description', 'genre', 'category')
+        fields = (
+            'name', 'year', 'description', 'genre', 'category',
+            'genre_mode', 'slug_match', 'year_min', 'year_max', 'decade',
+            'rating_min', 'rating_max', 'reviews_min'
+        )
+
+    def slug_condition(self, field_name, slugs):
+        """Условие на slug с учетом режима сравнения."""
+        if self.form.cleaned_data.get('slug_match') == 'contains':
+            return reduce(or_, (
+                Q(**{f'{field_name}__icontains': slug}) for slug in slugs
+            ))
+        return Q(**{f'{field_name}__in': slugs})
+
+    def filter_noop(self, queryset, name, value):
+        """Параметр влияет на другие фильтры и сам ничего не отбирает."""
+        return queryset
+
+    def filter_name(self, queryset, name, value):
+        """Поиск слов в названии по полнотекстовому индексу."""
+        return search_titles(queryset, value, column='name', ranked=False)
+
+    def filter_decade(self, queryset, name, value):
+        """Десятилетие как диапазон годов: decade=1990 - с 1990 по 1999."""
+        start = int(value) // 10 * 10
+        return queryset.filter(year__gte=start, year__lt=start + 10)
+
+    def filter_category(self, queryset, name, value):
+        return queryset.filter(self.slug_condition('category__slug', value))
+
+    def filter_genre(self, queryset, name, value):
+        """Отбор через подзапрос к связям, без дублей строк."""
+        links = Title.genre.through.objects
+        match_all = self.form.cleaned_data.get('genre_mode') == 'all'
+        if match_all and self.form.cleaned_data.get('slug_match') == (
+            'contains'
+        ):
+            # Подстрока может совпасть с несколькими жанрами, и счет
+            # жанров ничего не скажет: подзапрос на каждую подстроку.
+            for slug in set(value):
+                queryset = queryset.filter(pk__in=links.filter(
+                    genre__slug__icontains=slug
+                ).values('title_id'))
+            return queryset
+        links = links.filter(self.slug_condition('genre__slug', value))
+        if match_all:
+            links = links.values('title_id').annotate(
+                matched=Count('genre_id', distinct=True)
+            ).filter(matched=len(set(value)))
+        return queryset.filter(pk__in=links.values('title_id'))
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск ?search= по названию и описанию произведения.
+    Без явного ?ordering= результаты сортируются по релевантности.
+    """
+
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        queryset = search_titles(queryset, text)
+        if (
+            'search_rank' in queryset.query.annotations
+            and not request.query_params.get('ordering')
+        ):
+            queryset = queryset.order_by('search_rank', 'name')
+        return queryset
+
+
+def genre_facet(titles):
+    links = Title.genre.through.objects.filter(
+        title_id__in=titles.values('pk')
+    )
+    return [
+        {'slug': row['genre__slug'], 'name': row['genre__name'],
+         'count': row['count']}
+        for row in links.values('genre__slug', 'genre__name').annotate(
+            count=Count('title_id')
+        ).order_by('-count', 'genre__slug')
+    ]
+
+
+def category_facet(titles):
+    return [
+        {'slug': row['category__slug'], 'name': row['category__name'],
+         'count': row['count']}
+        for row in titles.values('category__slug', 'category__name').annotate(
+            count=Count('pk')
+        ).order_by('-count', 'category__slug')
+    ]
+
+
+def year_facet(titles):
+    decade = Cast(F('year') / 10, IntegerField()) * 10
+    return list(
+        titles.annotate(decade=decade).values('decade').annotate(
+            count=Count('pk')
+        ).order_by('decade')
+    )
+
+
+TITLE_FACETS = {
+    'genre': genre_facet,
+    'category': category_facet,
+    'year': year_facet,
+}
+
+
+def title_facets(titles, names):
+    """
+    Количество произведений по жанрам, категориям и десятилетиям
+    для уже отфильтрованной выборки: один GROUP BY на каждый фасет.
+    """
+    unknown = set(names) - set(TITLE_FACETS)
+    if unknown:
+        raise ValidationError({'facets': (
+            f'Неизвестные фасеты: {", ".join(sorted(unknown))}. '
+            f'Доступны: {", ".join(TITLE_FACETS)}.'
+        )})
+    titles = titles.order_by()
+    return {name: TITLE_FACETS[name](titles) for name in names}
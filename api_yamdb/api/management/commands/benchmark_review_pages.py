@@ -0,0 +1,121 @@
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+
+from api.pagination import KeysetPagination, encode_position
+from reviews.models import Category, Review, Title
+
+BATCH_SIZE = 10_000
+PAGES = (1, 10, 100, 1000, 10_000)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Замер глубоких страниц отзывов: OFFSET против курсора."""
+
+    help = (
+        'Создает произведение с синтетическими отзывами внутри '
+        'транзакции, сравнивает время страниц 1-10000 при выборке с '
+        'OFFSET и по курсору (pub_date, id) и откатывает изменения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reviews', type=int, default=60_000,
+            help='Количество отзывов у произведения.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Сколько раз повторить каждый запрос.'
+        )
+
+    def timed(self, fetch, repeat):
+        """Лучшее время выборки страницы, мс."""
+        best = None
+        for _ in range(repeat):
+            start = perf_counter()
+            fetch()
+            elapsed = (perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def create_reviews(self, title, count):
+        for offset in range(0, count, BATCH_SIZE):
+            numbers = range(offset, min(offset + BATCH_SIZE, count))
+            authors = User.objects.bulk_create(
+                User(
+                    username=f'benchmark-{number}',
+                    email=f'benchmark-{number}@yamdb.fake'
+                )
+                for number in numbers
+            )
+            if authors[0].pk is None:
+                authors = User.objects.filter(
+                    username__startswith='benchmark-'
+                ).order_by('pk')[offset:offset + len(numbers)]
+            Review.objects.bulk_create(
+                Review(title=title, author=author, text='Отзыв', score=5)
+                for author in authors
+            )
+
+    def run(self, options):
+        title = Title.objects.create(
+            name='Синтетика', year=2000,
+            category=Category.objects.create(
+                name='Синтетика', slug='benchmark-review-pages'
+            )
+        )
+        start = perf_counter()
+        self.create_reviews(title, options['reviews'])
+        self.stdout.write(
+            f'{options["reviews"]} отзывов создано за '
+            f'{perf_counter() - start:.1f} с.'
+        )
+        reviews = Review.objects.filter(title=title)
+        paginator = KeysetPagination()
+        size = paginator.page_size
+        ordered = reviews.order_by(*paginator.ordering)
+        factory = RequestFactory()
+        self.stdout.write('Страница\tOFFSET, мс\tкурсор, мс')
+        for page in PAGES:
+            offset = (page - 1) * size
+            if offset >= options['reviews']:
+                break
+            cursor = ''
+            if offset:
+                cursor = encode_position(
+                    *ordered.values_list('pub_date', 'pk')[offset - 1]
+                )
+            request = Request(factory.get('/', {'cursor': cursor}))
+            by_offset = self.timed(
+                lambda: list(ordered[offset:offset + size]),
+                options['repeat']
+            )
+            by_cursor = self.timed(
+                lambda: paginator.paginate_queryset(reviews, request),
+                options['repeat']
+            )
+            self.stdout.write(f'{page}\t{by_offset:.2f}\t{by_cursor:.2f}')
+        # План запроса самой глубокой из замеренных страниц.
+        with CaptureQueriesContext(connection) as queries:
+            paginator.paginate_queryset(reviews, request)
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(f'EXPLAIN QUERY PLAN {queries[-1]["sql"]}')
+            plan = '\n'.join(str(row[-1]) for row in db_cursor.fetchall())
+        self.stdout.write(f'План выборки по курсору:\n{plan}')
+        if 'review_title_pub_date_idx' not in plan:
+            raise CommandError(
+                'Выборка по курсору не использует индекс '
+                'review_title_pub_date_idx.'
+            )
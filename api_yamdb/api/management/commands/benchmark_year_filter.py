@@ -0,0 +1,92 @@
+import random
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+
+from api.filters import TitleFilter
+from reviews.models import Category, Title
+
+BATCH_SIZE = 10_000
+FIRST_YEAR = 1900
+
+
+class Command(BaseCommand):
+    """Замер фильтра произведений по десятилетию на синтетическом каталоге."""
+
+    help = (
+        'Создает синтетический каталог произведений внутри транзакции, '
+        'показывает план и время запроса ?decade= и откатывает изменения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--titles', type=int, default=500_000,
+            help='Размер синтетического каталога.'
+        )
+        parser.add_argument(
+            '--decade', type=int, default=1990,
+            help='Десятилетие для фильтра ?decade=.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Сколько раз повторить каждый запрос.'
+        )
+
+    def timed(self, queryset, repeat):
+        """Лучшее время подсчета и выборки первой страницы, мс."""
+        best = None
+        for _ in range(repeat):
+            start = perf_counter()
+            queryset.count()
+            list(queryset.order_by('year')[:5])
+            elapsed = (perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        rng = random.Random(0)
+        category = Category.objects.create(
+            name='Синтетика', slug='benchmark-year-filter'
+        )
+        last_year = Title._meta.get_field('year').validators[0].limit_value
+        start = perf_counter()
+        for offset in range(0, options['titles'], BATCH_SIZE):
+            Title.objects.bulk_create(
+                Title(
+                    name=f'Произведение {number}',
+                    year=rng.randint(FIRST_YEAR, last_year),
+                    category=category
+                )
+                for number in range(
+                    offset, min(offset + BATCH_SIZE, options['titles'])
+                )
+            )
+        self.stdout.write(
+            f'Каталог из {options["titles"]} произведений создан за '
+            f'{perf_counter() - start:.1f} с.'
+        )
+
+        decade = options['decade']
+        indexed = TitleFilter(
+            {'decade': decade}, queryset=Title.objects.all()
+        ).qs
+        scanned = Title.objects.annotate(scan_year=F('year') + 0).filter(
+            scan_year__gte=decade, scan_year__lt=decade + 10
+        )
+        plan = indexed.explain()
+        self.stdout.write(f'План ?decade={decade}:\n{plan}')
+        repeat = options['repeat']
+        self.stdout.write(
+            f'Найдено: {indexed.count()}. '
+            f'С индексом: {self.timed(indexed, repeat):.1f} мс, '
+            f'полный просмотр: {self.timed(scanned, repeat):.1f} мс.'
+        )
+        if 'INDEX' not in plan.upper():
+            raise CommandError('Запрос по десятилетию не использует индекс.')
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from reviews.metrics import report
+
+
+class Command(BaseCommand):
+    """Метрики кешей всех процессов сервиса."""
+
+    help = (
+        'Показывает попадания, промахи, вытеснения, размер и время '
+        'пересчета для каждого слоя кеша с разбивкой по эндпоинтам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Вывести отчет в JSON, как GET /api/v1/cache-metrics/.'
+        )
+
+    def handle(self, *args, **options):
+        data = report()
+        if options['json']:
+            self.stdout.write(json.dumps(data, ensure_ascii=False, indent=2))
+            return
+        self.stdout.write(f'Процессов с метриками: {data["processes"]}')
+        for layer, endpoints in data['layers'].items():
+            self.stdout.write(self.style.MIGRATE_HEADING(layer))
+            for basename, values in endpoints.items():
+                parts = []
+                for name, value in sorted(values.items()):
+                    if isinstance(value, dict):
+                        value = (
+                            f'{value["count"]}×{value["avg"]} мс '
+                            f'(макс. {value["max"]})'
+                        )
+                    parts.append(f'{name}={value}')
+                self.stdout.write(f'  {basename}: {", ".join(parts)}')
+        self.stdout.write(self.style.MIGRATE_HEADING('backends'))
+        for alias, stats in data['backends'].items():
+            self.stdout.write(
+                f'  {alias}: записей {stats["entries"]}, '
+                f'{stats["bytes"]} байт, вытеснено {stats["evicted"]}'
+            )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import purge_tags, tag_versions
+
+
+class Command(BaseCommand):
+    """Просмотр и сброс тегов кеша ответов API."""
+
+    help = (
+        'Показывает метки версий тегов кеша ответов; с --purge '
+        'сбрасывает ответы с этими тегами. Теги задаются полностью, '
+        'например "title:12:reviews".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tags', nargs='+',
+            help='Теги ответов, например "titles" или "title:12".'
+        )
+        parser.add_argument(
+            '--purge', action='store_true',
+            help='Сбросить ответы с этими тегами.'
+        )
+
+    def handle(self, *args, **options):
+        tags = set(options['tags'])
+        if options['purge']:
+            purge_tags(tags)
+            self.stdout.write(self.style.SUCCESS(
+                f'Сброшено тегов: {len(tags)}.'
+            ))
+            return
+        for tag, version in sorted(tag_versions(tags).items()):
+            self.stdout.write(f'{tag}\t{version}')
@@ -0,0 +1,133 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from time import perf_counter
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from reviews.models import Category, Genre, Title
+
+TITLES_URL = '/api/v1/titles/'
+
+
+def default_host():
+    hosts = [host for host in settings.ALLOWED_HOSTS if '*' not in host]
+    return hosts[0].lstrip('.') if hosts else 'localhost'
+
+
+class Command(BaseCommand):
+    """Прогрев кешей популярными страницами API."""
+
+    help = (
+        'Параллельно запрашивает анонимно первые страницы списков '
+        'произведений (всех, по категориям и жанрам), справочники, '
+        'страницы популярных произведений и адреса из '
+        'settings.WARM_CACHE_PATHS. Подходит для запуска перед стартом '
+        'сервера: запросы проходят через WSGI-обработчик приложения, и '
+        'готовые ответы попадают в общий кеш ответов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=1,
+            help='Сколько страниц каждого списка произведений запросить.'
+        )
+        parser.add_argument(
+            '--titles', type=int, default=20,
+            help='Сколько страниц произведений с наибольшим числом '
+                 'отзывов запросить.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Количество потоков.'
+        )
+        parser.add_argument(
+            '--host', default=default_host(),
+            help='Заголовок Host запросов: он входит в ключ кеша и в '
+                 'ссылки пагинации.'
+        )
+
+    def hot_paths(self, pages, titles):
+        """Адреса для прогрева в порядке убывания популярности."""
+        category_slugs = list(
+            Category.objects.order_by('slug').values_list('slug', flat=True)
+        )
+        genre_slugs = list(
+            Genre.objects.order_by('slug').values_list('slug', flat=True)
+        )
+        filters = (
+            [''] + [f'category={slug}' for slug in category_slugs]
+            + [f'genre={slug}' for slug in genre_slugs]
+        )
+        paths = ['/api/v1/categories/', '/api/v1/genres/']
+        for query in filters:
+            for page in range(1, pages + 1):
+                params = [query] if query else []
+                if page > 1:
+                    params.append(f'page={page}')
+                paths.append(
+                    f'{TITLES_URL}?{"&".join(params)}'
+                    if params else TITLES_URL
+                )
+        paths += [
+            f'{TITLES_URL}{pk}/'
+            for pk in Title.objects.order_by(
+                '-review_count', 'pk'
+            ).values_list('pk', flat=True)[:titles]
+        ]
+        return paths + list(settings.WARM_CACHE_PATHS)
+
+    def fetch(self, handler, path, host):
+        """Анонимный GET-запрос; возвращает статус и время в мс."""
+        url = urlsplit(path)
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'SERVER_NAME': host,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': host,
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(),
+            'wsgi.errors': sys.stderr,
+        }
+        statuses = []
+        started = perf_counter()
+        try:
+            response = handler(
+                environ, lambda status, headers: statuses.append(status)
+            )
+            response.close()
+        finally:
+            connections.close_all()
+        status = int(statuses[0].split()[0])
+        return path, status, (perf_counter() - started) * 1000
+
+    def handle(self, *args, **options):
+        paths = self.hot_paths(options['pages'], options['titles'])
+        handler = WSGIHandler()
+        started = perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            results = list(pool.map(
+                lambda path: self.fetch(handler, path, options['host']),
+                paths
+            ))
+        failed = 0
+        for path, status, elapsed in results:
+            line = f'{status}\t{elapsed:8.1f} мс\t{path}'
+            if status != 200:
+                failed += 1
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+        total = (perf_counter() - started) * 1000
+        style = self.style.ERROR if failed else self.style.SUCCESS
+        self.stdout.write(style(
+            f'Запрошено страниц: {len(results)}, с ошибкой: {failed}, '
+            f'общее время {total:.1f} мс.'
+        ))
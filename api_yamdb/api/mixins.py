@@ -1,7 +1,20 @@
+import hashlib
 import re
+from time import perf_counter, time
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from reviews.metrics import metrics
+from .cache import (REVALIDATE_ATTR, response_cache, response_cache_key,
+                    revalidate_response, tag_versions)
+from .pagination import COUNT_EXACT, queryset_key
 
 User = get_user_model()
 
@@ -35,3 +48,327 @@ class UserValidationMixin(serializers.Serializer):
             )
 
         return data
+
+
+class EarlyResponse(Exception):
+    """Прерывает обработку запроса готовым ответом (304 или из кеша)."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    Миксин вьюсета. ETag и Last-Modified для list и retrieve.
+    Валидаторы считаются одним запросом (объект или MAX(updated_at)
+    и COUNT по выборке), и при совпадении ответ 304 отдается до
+    сериализации. Если пагинации не нужно точное количество (режимы
+    count=approximate|none, курсор), COUNT не выполняется: валидаторы
+    считаются по записям страницы после ее выборки.
+    """
+
+    modified_field = 'updated_at'
+    conditional_actions = ('list', 'retrieve')
+
+    def get_object(self):
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
+    def get_etag_version(self):
+        """Версия данных, не отраженных в updated_at самих объектов."""
+        return ''
+
+    def get_list_state(self, queryset):
+        """Дата последнего изменения и размер выборки списка."""
+        aggregate = queryset.order_by().aggregate(
+            last_modified=Max(self.modified_field), count=Count('pk')
+        )
+        return aggregate['last_modified'], aggregate['count']
+
+    def counts_list(self):
+        """Нужно ли пагинации списка точное количество записей."""
+        paginator = self.paginator
+        if paginator is None:
+            return True
+        get_count_mode = getattr(paginator, 'get_count_mode', None)
+        return (
+            get_count_mode is not None
+            and get_count_mode(self.request, self) == COUNT_EXACT
+        )
+
+    def get_validators(self):
+        """
+        Дата последнего изменения и отпечаток содержимого ответа; None,
+        если валидаторы считаются по странице (get_page_validators).
+        """
+        if self.action == 'retrieve':
+            obj = self.get_object()
+            last_modified, state = getattr(obj, self.modified_field), obj.pk
+        elif not self.counts_list():
+            self.validate_page = True
+            return None
+        else:
+            queryset = self.filter_queryset(self.get_queryset())
+            last_modified, state = self.get_list_state(queryset)
+            # Пагинация той же выборки берет количество отсюда.
+            self.list_count = queryset_key(queryset), state
+        return self.make_validators(last_modified, state)
+
+    def get_page_validators(self, page):
+        """Валидаторы по записям страницы и ссылке на следующую."""
+        dates = [getattr(obj, self.modified_field) for obj in page]
+        state = (
+            [(obj.pk, date.isoformat()) for obj, date in zip(page, dates)],
+            self.paginator.get_next_link() is not None,
+            getattr(self.paginator, 'approximate_count', None),
+        )
+        return self.make_validators(max(dates, default=None), state)
+
+    def make_validators(self, last_modified, state):
+        fingerprint = '|'.join(str(part) for part in (
+            self.basename,
+            self.request.get_full_path(),
+            self.request.accepted_renderer.format,
+            last_modified and last_modified.isoformat(),
+            state,
+            self.get_etag_version(),
+        ))
+        etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+        return etag, last_modified and int(last_modified.timestamp())
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validators = None
+        self.validate_page = False
+        if (
+            request.method in ('GET', 'HEAD')
+            and self.action in self.conditional_actions
+        ):
+            self.validators = self.get_validators()
+            if self.validators is not None:
+                self.check_preconditions()
+
+    def check_preconditions(self):
+        response = get_conditional_response(self.request, *self.validators)
+        if response is not None:
+            raise EarlyResponse(response)
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and getattr(self, 'validate_page', False):
+            self.validators = self.get_page_validators(page)
+            self.check_preconditions()
+        return page
+
+    def handle_exception(self, exc):
+        if isinstance(exc, EarlyResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        validators = getattr(self, 'validators', None)
+        if validators and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class ResponseCacheMixin(ConditionalGetMixin):
+    """
+    Миксин вьюсета. Готовые ответы на анонимные GET-запросы действий
+    из cache_response_actions хранятся в кеше settings.RESPONSE_CACHE
+    под ключом с метками версий тегов get_cache_tags(); изменение данных
+    меняет метки (api.cache.purge_tags), и запись перестает читаться.
+
+    Запись свежа response_cache_timeout секунд (по умолчанию
+    settings.RESPONSE_CACHE_TIMEOUT). Если stale_while_revalidate больше
+    нуля, истекшая запись еще столько секунд отдается как есть, пока
+    один процесс, взявший блокировку в кеше, пересобирает ответ в фоне.
+    Блокировка - cache.add(), он должен быть атомарным (файловый кеш
+    reviews.cache_backends - в пределах сервера, Memcached и Redis -
+    везде). Сброс тега делает запись недействительной сразу.
+    """
+
+    cache_response_actions = ()
+    response_cache_timeout = None
+    stale_while_revalidate = 0
+
+    def get_cache_tags(self):
+        """Теги, при сбросе которых ответ устаревает."""
+        return ()
+
+    def get_response_cache_key(self):
+        request = self.request
+        if (
+            request.method != 'GET'
+            or self.action not in self.cache_response_actions
+            or not request.user.is_anonymous
+        ):
+            return None
+        # Метки тегов читаются до выборки данных: ответ, собранный
+        # во время сброса тега, сохранится под устаревшим ключом.
+        self.tag_versions = tag_versions(self.get_cache_tags())
+        return response_cache_key(request, self.tag_versions)
+
+    def get_cached_response(self, key):
+        """Свежая или допустимая устаревшая запись кеша ответов."""
+        if getattr(self.request, REVALIDATE_ATTR, False):
+            return None
+        entry = response_cache().get(key)
+        if entry is None:
+            metrics.incr('responses', 'misses', self.basename)
+            return None
+        if time() < entry['expires']:
+            metrics.incr('responses', 'hits', self.basename)
+            return entry
+        if not self.stale_while_revalidate:
+            metrics.incr('responses', 'misses', self.basename)
+            return None
+        lock_key = f'{key}:lock'
+        if response_cache().add(lock_key, True, self.stale_while_revalidate):
+            metrics.incr('responses', 'revalidations', self.basename)
+            revalidate_response(self.request, lock_key, self.basename)
+        metrics.incr('responses', 'stale_served', self.basename)
+        return entry
+
+    def get_validators(self):
+        self.response_cache_key = self.get_response_cache_key()
+        self.cached_response = None
+        if self.response_cache_key:
+            self.cached_response = self.get_cached_response(
+                self.response_cache_key
+            )
+            if self.cached_response is not None:
+                return self.cached_response['validators']
+            self.render_started = perf_counter()
+        return super().get_validators()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        cached = getattr(self, 'cached_response', None)
+        if cached is not None:
+            raise EarlyResponse(HttpResponse(
+                cached['content'], content_type=cached['content_type']
+            ))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        key = getattr(self, 'response_cache_key', None)
+        if (
+            key and self.cached_response is None
+            and response.status_code == 200
+        ):
+            validators = self.validators
+            basename, started = self.basename, self.render_started
+            timeout = self.response_cache_timeout
+            if timeout is None:
+                timeout = settings.RESPONSE_CACHE_TIMEOUT
+
+            def store(rendered):
+                metrics.timing(
+                    'responses', 'render_ms', basename,
+                    (perf_counter() - started) * 1000
+                )
+                metrics.incr(
+                    'responses', 'bytes_written', basename,
+                    len(rendered.content)
+                )
+                response_cache().set(key, {
+                    'content': rendered.content,
+                    'content_type': rendered['Content-Type'],
+                    'validators': validators,
+                    'expires': time() + timeout,
+                }, timeout + self.stale_while_revalidate)
+
+            response.add_post_render_callback(store)
+        return response
+
+
+class SparseFieldsMixin:
+    """
+    Миксин вьюсета. Параметры ?fields=a,b и ?omit=c для действий из
+    sparse_field_actions: лишние поля убираются из сериализатора, а
+    выборка читает только колонки и связи оставшихся полей.
+    Пути модели для поля ответа берутся из sparse_field_paths (по
+    умолчанию - одноименное поле модели); пути через __ подключают
+    select_related, поле с пустым списком путей не читает ничего.
+    """
+
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+    sparse_field_actions = ('list', 'retrieve')
+    sparse_field_paths = {}
+
+    def get_sparse_fields(self):
+        """Запрошенные поля ответа или None для полного ответа."""
+        if hasattr(self, '_sparse_fields'):
+            return self._sparse_fields
+        self._sparse_fields = None
+        params = self.request.query_params
+        if (
+            self.request.method not in ('GET', 'HEAD')
+            or self.action not in self.sparse_field_actions
+            or not {self.fields_query_param, self.omit_query_param} & set(
+                params
+            )
+        ):
+            return None
+        available = list(self.get_serializer_class()().fields)
+        selected = {}
+        for param in (self.fields_query_param, self.omit_query_param):
+            selected[param] = [
+                name for name in params.get(param, '').split(',') if name
+            ]
+            unknown = set(selected[param]) - set(available)
+            if unknown:
+                raise ValidationError({param: (
+                    f'Неизвестные поля: {", ".join(sorted(unknown))}. '
+                    f'Доступны: {", ".join(available)}.'
+                )})
+        requested = selected[self.fields_query_param] or available
+        self._sparse_fields = [
+            name for name in available
+            if name in requested
+            and name not in selected[self.omit_query_param]
+        ]
+        return self._sparse_fields
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        # Дата изменения нужна валидаторам ETag (ConditionalGetMixin),
+        # поля сортировки пагинации - курсору следующей страницы.
+        paths = [queryset.model._meta.pk.name]
+        if hasattr(self, 'modified_field'):
+            paths.append(self.modified_field)
+        ordering = getattr(self.paginator, 'ordering', None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        paths.extend(field.lstrip('-') for field in ordering)
+        for name in fields:
+            paths.extend(self.sparse_field_paths.get(name, (name,)))
+        related = {path.rsplit('__', 1)[0] for path in paths if '__' in path}
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*paths)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            target = getattr(serializer, 'child', serializer)
+            for name in set(target.fields) - set(fields):
+                target.fields.pop(name)
+        return serializer
@@ -0,0 +1,255 @@
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+from collections import OrderedDict
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.paginator import InvalidPage, Page
+from django.core.paginator import Paginator as DjangoPaginator
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+CURSOR_QUERY_PARAM = 'cursor'
+COUNT_QUERY_PARAM = 'count'
+COUNT_EXACT = 'exact'
+COUNT_APPROXIMATE = 'approximate'
+COUNT_NONE = 'none'
+COUNT_MODES = (COUNT_EXACT, COUNT_APPROXIMATE, COUNT_NONE)
+
+
+def queryset_key(queryset):
+    """Отпечаток SQL выборки без сортировки; None для пустой выборки."""
+    try:
+        sql = str(queryset.order_by().query)
+    except EmptyResultSet:
+        return None
+    return hashlib.md5(sql.encode()).hexdigest()
+
+
+def encode_position(pub_date, pk, reverse=False):
+    """Непрозрачный курсор: ключ записи и направление чтения."""
+    position = {'d': pub_date.isoformat(), 'i': pk, 'r': int(reverse)}
+    return urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    Постраничный вывод по ключу (pub_date, id) без OFFSET: курсор
+    хранит ключ крайней записи страницы, и следующая страница читается
+    по индексу с этого места. Вставки между запросами не сдвигают
+    страницы, а время запроса не зависит от глубины.
+    Включается параметром ?cursor= (пустым для первой страницы).
+    """
+
+    cursor_query_param = CURSOR_QUERY_PARAM
+    invalid_cursor_message = 'Неверный курсор.'
+    ordering = ('pub_date', 'id')
+
+    def __init__(self):
+        self.page_size = api_settings.PAGE_SIZE
+
+    def encode_cursor(self, obj, reverse):
+        return replace_query_param(
+            self.base_url, self.cursor_query_param,
+            encode_position(obj.pub_date, obj.pk, reverse)
+        )
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            position = json.loads(urlsafe_b64decode(cursor.encode()))
+            return (
+                datetime.fromisoformat(position['d']),
+                int(position['i']),
+                bool(position['r']),
+            )
+        except (DecodeError, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        position = self.decode_cursor(request)
+        reverse = bool(position and position[2])
+        if position:
+            pub_date, pk, _ = position
+            # Условие на pub_date вынесено отдельно, чтобы поиск по
+            # индексу начинался с позиции курсора, а не с начала выборки.
+            lookup = 'lt' if reverse else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'pub_date__{lookup}e': pub_date}),
+                Q(**{f'pub_date__{lookup}': pub_date})
+                | Q(**{f'pk__{lookup}': pk})
+            )
+        ordering = [
+            f'-{field}' if reverse else field for field in self.ordering
+        ]
+        page = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if reverse:
+            page.reverse()
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        self.page = page
+        return page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return replace_query_param(
+                self.base_url, self.cursor_query_param, ''
+            )
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class CountModeMixin:
+    """
+    Миксин пагинации. Режим подсчета записей выбирается параметром
+    ?count= или атрибутом вьюсета pagination_count:
+    exact - точное количество; если вьюсет уже посчитал ту же выборку
+    для валидаторов ETag (list_count), COUNT не повторяется;
+    approximate - количество из кеша процесса с пометкой
+    count_approximate, обновляется раз в PAGINATION_COUNT_TIMEOUT секунд;
+    none - без количества. В двух последних режимах читается на одну
+    запись больше страницы, и по ней решается, есть ли следующая.
+    """
+
+    count_query_param = COUNT_QUERY_PARAM
+
+    def get_count_mode(self, request, view):
+        mode = request.query_params.get(self.count_query_param)
+        if mode in COUNT_MODES:
+            return mode
+        return getattr(view, 'pagination_count', COUNT_EXACT)
+
+    def get_known_count(self, queryset, view):
+        """Количество из валидаторов вьюсета для той же выборки."""
+        known = getattr(view, 'list_count', None)
+        if known is not None and known[0] == queryset_key(queryset):
+            return known[1]
+        return None
+
+    def get_exact_count(self, queryset, view):
+        count = self.get_known_count(queryset, view)
+        if count is None:
+            count = queryset.count()
+        return count
+
+    def get_approximate_count(self, queryset, view):
+        key = queryset_key(queryset)
+        if key is None:
+            return 0
+        key = f'pagination:count:{key}'
+        cache = caches[settings.PAGINATION_COUNT_CACHE]
+        count = cache.get(key)
+        if count is None:
+            count = self.get_exact_count(queryset, view)
+            cache.set(key, count, settings.PAGINATION_COUNT_TIMEOUT)
+        return count
+
+    def fetch_page(self, queryset, view, offset, limit):
+        """Страница и граница количества без COUNT по всей выборке."""
+        rows = list(queryset[offset:offset + limit + 1])
+        self.approximate_count = None
+        if self.count_mode == COUNT_APPROXIMATE:
+            self.approximate_count = self.get_approximate_count(
+                queryset, view
+            )
+        # Для ссылок next и previous достаточно знать, есть ли запись
+        # после страницы.
+        return rows[:limit], offset + len(rows)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count_mode == COUNT_NONE:
+            del response.data['count']
+        elif self.count_mode == COUNT_APPROXIMATE:
+            response.data['count'] = self.approximate_count
+            response.data['count_approximate'] = True
+            response.data.move_to_end('count_approximate', last=False)
+            response.data.move_to_end('count', last=False)
+        return response
+
+
+class PageNumberPagination(CountModeMixin, pagination.PageNumberPagination):
+    """Пагинация по номеру страницы с выбором режима подсчета."""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = self.get_count_mode(request, view)
+        if self.count_mode == COUNT_EXACT:
+            self.known_count = self.get_known_count(queryset, view)
+            return super().paginate_queryset(queryset, request, view)
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.request = request
+        page_number = request.query_params.get(self.page_query_param, 1)
+        try:
+            offset = max(int(page_number) - 1, 0) * page_size
+        except (TypeError, ValueError):
+            offset = 0
+        paginator = DjangoPaginator(queryset, page_size)
+        rows, paginator.count = self.fetch_page(
+            queryset, view, offset, page_size
+        )
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            ))
+        self.page = Page(rows, number, paginator)
+        return rows
+
+    def django_paginator_class(self, object_list, per_page):
+        paginator = DjangoPaginator(object_list, per_page)
+        if self.known_count is not None:
+            paginator.count = self.known_count
+        return paginator
+
+
+class LimitOffsetPagination(CountModeMixin, pagination.LimitOffsetPagination):
+    """Пагинация limit/offset с выбором режима подсчета."""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = self.get_count_mode(request, view)
+        if self.count_mode == COUNT_EXACT:
+            self.known_count = self.get_known_count(queryset, view)
+            return super().paginate_queryset(queryset, request, view)
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.request = request
+        rows, self.count = self.fetch_page(
+            queryset, view, self.offset, self.limit
+        )
+        return rows
+
+    def get_count(self, queryset):
+        if self.known_count is not None:
+            return self.known_count
+        return super().get_count(queryset)
@@ -2,17 +2,21 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import send_mail
-from django.db.models import Avg
-from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from rest_framework.exceptions import NotFound
 
+from .cache import cached_representations, title_cache_key
 from .mixins import UserValidationMixin
 from .constants import (EMAIL_MAX_LENGTH,
                         CHARFIELD_MAX_LENGTH,
                         SCORE_MAX_VALUE,
-                        SCORE_MIN_VALUE)
-from reviews.models import Category, Comment, Genre, Review, Title
+                        SCORE_MIN_VALUE,
+                        SCORE_PERCENTILES)
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleRank)
+from reviews.ratings import histogram_median, histogram_quantile
+from reviews.registry import (attach_genre_ids, categories, genres,
+                              title_genre_ids)
 from .constants import TITLE_SERIALIZER_FIELDS
 
 User = get_user_model()
@@ -155,12 +159,63 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
+class RegistrySlugField(serializers.RelatedField):
+    """Поле slug жанра или категории, проверяемое по справочнику в памяти."""
+
+    default_error_messages = {
+        'does_not_exist': 'Объект со slug={value} не существует.',
+        'invalid': 'Некорректное значение.',
+    }
+
+    def __init__(self, registry, **kwargs):
+        self.registry = registry
+        super().__init__(**kwargs)
+
+    def get_queryset(self):
+        return self.registry.model.objects.all()
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        record = self.registry.by_slug(data)
+        if record is None:
+            self.fail('does_not_exist', value=data)
+        return self.registry.instance(record)
+
+    def to_representation(self, value):
+        return value.slug
+
+
+class TitleListSerializer(serializers.ListSerializer):
+    """
+    Страница произведений из кеша представлений; для промахов жанры
+    загружаются одним запросом. Неполный набор полей (?fields=)
+    собирается без кеша, жанры - только если они запрошены.
+    """
+
+    def to_representation(self, data):
+        titles = list(data.all() if hasattr(data, 'all') else data)
+        if set(self.child.fields) != set(TITLE_SERIALIZER_FIELDS):
+            if 'genre' in self.child.fields:
+                attach_genre_ids(titles)
+            return [self.child.to_representation(title) for title in titles]
+        return cached_representations(
+            titles,
+            title_cache_key,
+            lambda missing: [
+                self.child.to_representation(title)
+                for title in attach_genre_ids(missing)
+            ],
+            basename=getattr(self.context.get('view'), 'basename', '')
+        )
+
+
 class TitleSerializer(serializers.ModelSerializer):
     """Сериализатор для операций чтения модели Title."""
 
-    genre = GenreSerializer(many=True)
-    category = CategorySerializer()
-    rating = serializers.SerializerMethodField()
+    genre = serializers.SerializerMethodField()
+    category = serializers.SerializerMethodField()
+    rating = serializers.FloatField(read_only=True)
 
     class Meta:
         """Метаданные сериализатора."""
@@ -168,25 +223,96 @@ class TitleSerializer(serializers.ModelSerializer):
         model = Title
         fields = TITLE_SERIALIZER_FIELDS
         read_only_fields = TITLE_SERIALIZER_FIELDS
+        list_serializer_class = TitleListSerializer
+
+    def get_genre(self, obj):
+        return [
+            {'name': record.name, 'slug': record.slug}
+            for record in map(genres.by_id, title_genre_ids(obj))
+            if record is not None
+        ]
+
+    def get_category(self, obj):
+        record = categories.by_id(obj.category_id)
+        if record is None:
+            return None
+        return {'name': record.name, 'slug': record.slug}
+
+
+class TopTitleListSerializer(serializers.ListSerializer):
+    """Страница рейтинга с произведениями из кеша представлений."""
+
+    def to_representation(self, data):
+        ranks = list(data)
+        titles = TitleSerializer(
+            [rank.title for rank in ranks], many=True, context=self.context
+        ).data
+        return [
+            {**title, **self.child.to_representation(rank)}
+            for title, rank in zip(titles, ranks)
+        ]
+
+
+class TopTitleSerializer(serializers.ModelSerializer):
+    """Сериализатор места произведения в рейтинге."""
+
+    class Meta:
+        """Метаданные сериализатора."""
+
+        model = TitleRank
+        fields = ('weighted_rating',)
+        list_serializer_class = TopTitleListSerializer
+
 
-    def get_rating(self, obj):
-        """Вычисление среднего рейтинга произведения."""
-        if obj.reviews.count() > 0:
-            return obj.reviews.aggregate(Avg('score'))['score__avg']
-        return None
+class TitleScoresSerializer(serializers.ModelSerializer):
+    """Распределение оценок произведения по сохраненной гистограмме."""
+
+    histogram = serializers.SerializerMethodField()
+    median = serializers.SerializerMethodField()
+    percentiles = serializers.SerializerMethodField()
+
+    class Meta:
+        """Метаданные сериализатора."""
+
+        model = Title
+        fields = ('id', 'review_count', 'histogram', 'median', 'percentiles')
+
+    def _histogram(self, obj):
+        if not hasattr(obj, '_histogram'):
+            obj._histogram = dict(
+                obj.score_counts.filter(count__gt=0).values_list(
+                    'score', 'count'
+                )
+            )
+        return obj._histogram
+
+    def get_histogram(self, obj):
+        histogram = self._histogram(obj)
+        return {
+            str(score): histogram.get(score, 0)
+            for score in range(SCORE_MIN_VALUE, SCORE_MAX_VALUE + 1)
+        }
+
+    def get_median(self, obj):
+        return histogram_median(self._histogram(obj))
+
+    def get_percentiles(self, obj):
+        histogram = self._histogram(obj)
+        return {
+            str(percentile): histogram_quantile(histogram, percentile / 100)
+            for percentile in SCORE_PERCENTILES
+        }
 
 
 class TitleWriteSerializer(serializers.ModelSerializer):
     """Сериализатор для операций записи модели Title."""
 
-    category = serializers.SlugRelatedField(
-        queryset=Category.objects.all(),
-        slug_field='slug',
+    category = RegistrySlugField(
+        registry=categories,
         required=True
     )
-    genre = serializers.SlugRelatedField(
-        queryset=Genre.objects.all(),
-        slug_field='slug',
+    genre = RegistrySlugField(
+        registry=genres,
         many=True,
         allow_null=False,
         required=True
@@ -233,8 +359,7 @@ class ReviewSerializer(serializers.ModelSerializer):
     def validate(self, data):
         """Дополнительная проверка на уникальность пары автор+произведение."""
         if self.context['request'].method == 'POST':
-            title_id = self.context['view'].kwargs['title_id']
-            title = get_object_or_404(Title, pk=title_id)
+            title = self.context['view'].get_title()
             author = self.context['request'].user
             if Review.objects.filter(
                 author=author,
@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.signals import cleared_title_ids
+from .authentication import forget_user
+from .cache import missing_reviews, missing_titles, purge_tags
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, created=False, raw=False, **kwargs):
+    """Сбрасывает отзывы произведения и страницы с его рейтингом."""
+    if raw:
+        return
+    if created:
+        missing_reviews.discard((instance.title_id, instance.pk))
+    # Отложенное title_id не читаем: после удаления строки его не загрузить.
+    title_ids = {
+        instance.__dict__.get('title_id'),
+        getattr(instance, '_loaded_title_id', None),
+    } - {None}
+    purge_tags(
+        ['titles', f'review:{instance.pk}:comments']
+        + [f'title:{title_id}' for title_id in title_ids]
+        + [f'title:{title_id}:reviews' for title_id in title_ids]
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, raw=False, **kwargs):
+    """Сбрасывает комментарии к отзыву."""
+    if not raw:
+        purge_tags([f'review:{instance.review_id}:comments'])
+
+
+@receiver(post_save, sender=Title)
+def title_changed(sender, instance, created=False, raw=False, **kwargs):
+    """Сбрасывает страницу произведения и списки произведений."""
+    if raw:
+        return
+    if created:
+        missing_titles.discard(instance.pk)
+    purge_tags(['titles', f'title:{instance.pk}'])
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    """
+    Сбрасывает и список отзывов: у произведения без отзывов его не
+    сбросит удаление отзыва, а ответ должен стать 404.
+    """
+    purge_tags(
+        ['titles', f'title:{instance.pk}', f'title:{instance.pk}:reviews']
+    )
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """Сбрасывает произведения, у которых изменились жанры."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    title_ids = (
+        cleared_title_ids(instance, action, pk_set) if reverse
+        else [instance.pk]
+    )
+    purge_tags(['titles'] + [f'title:{pk}' for pk in title_ids])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, raw=False, **kwargs):
+    """Названия категорий есть в списках и страницах произведений."""
+    if not raw:
+        purge_tags(['categories'])
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def genre_changed(sender, raw=False, **kwargs):
+    """Названия жанров есть в списках и страницах произведений."""
+    if not raw:
+        purge_tags(['genres'])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Имена авторов есть в отзывах и комментариях, а роль и активность
+    читаются из кеша аутентификации.
+    """
+    if not (created or raw):
+        purge_tags(['authors'])
+        forget_user(instance.pk)
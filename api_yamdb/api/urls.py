@@ -33,6 +33,11 @@ urlpatterns = [
         views.YamdbTokenObtainPairView.as_view(),
         name='token'
     ),
+    path(
+        'v1/cache-metrics/',
+        views.CacheMetricsView.as_view(),
+        name='cache-metrics'
+    ),
     path(
         'v1/users/me/',
         views.UserSelfAPIView.as_view(),
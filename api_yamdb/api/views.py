@@ -2,23 +2,31 @@ from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status
+from rest_framework.decorators import action
 from rest_framework.filters import OrderingFilter
 from rest_framework.generics import (CreateAPIView,
                                      RetrieveUpdateAPIView)
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 
-from reviews.models import Category, Genre, Review, Title
-from .filters import TitleFilter
+from reviews.metrics import report
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleRank)
+from reviews.registry import categories, genres, refresh_catalog
+from .cache import missing_reviews, missing_titles
+from .filters import TitleFilter, TitleSearchFilter, title_facets
 from .permissions import IsAdmin, IsAdminOrReadOnly
 from .serializers import (CategorySerializer,
                           CommentSerializer,
                           GenreSerializer,
                           ReviewSerializer,
                           SignUpSerializer,
+                          TitleScoresSerializer,
                           TitleSerializer,
                           TitleWriteSerializer,
+                          TopTitleSerializer,
                           UserSerializer,
                           UserCreateSerializer,
                           YamdbTokenObtainPairViewSerializer)
@@ -73,7 +81,17 @@ class UserSelfAPIView(RetrieveUpdateAPIView):
     http_method_names = ['get', 'head', 'options', 'patch']
 
     def get_object(self):
-        return self.request.user
+        # В кеше аутентификации нет полей профиля, он читается из базы.
+        return get_object_or_404(User, pk=self.request.user.pk)
+
+
+class CacheMetricsView(APIView):
+    """Метрики кешей всех процессов для администратора."""
+
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return Response(report())
 
 
 class CategoryViewSet(CategoryGenreViewset):
@@ -81,6 +99,10 @@ class CategoryViewSet(CategoryGenreViewset):
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_response_actions = ('list',)
+
+    def get_cache_tags(self):
+        return ('categories',)
 
 
 class GenreViewSet(CategoryGenreViewset):
@@ -88,6 +110,10 @@ class GenreViewSet(CategoryGenreViewset):
 
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_response_actions = ('list',)
+
+    def get_cache_tags(self):
+        return ('genres',)
 
 
 class TitleViewSet(TitleManagementViewSet):
@@ -96,30 +122,117 @@ class TitleViewSet(TitleManagementViewSet):
     queryset = Title.objects.all()
     permission_classes = (IsAdminOrReadOnly,)
     http_method_names = ['get', 'post', 'patch', 'delete']
-    filter_backends = (DjangoFilterBackend, OrderingFilter)
-    ordering_fields = ['name']
+    filter_backends = (DjangoFilterBackend, OrderingFilter, TitleSearchFilter)
+    ordering_fields = ['name', 'rating', 'review_count']
     ordering = ['name']
     filterset_class = TitleFilter
+    cache_response_actions = ('list', 'retrieve')
+    response_cache_timeout = 5 * 60
+    stale_while_revalidate = 30
+    # Жанры загружаются отдельным запросом только для поля genre.
+    sparse_field_paths = {'genre': (), 'category': ('category',)}
+
+    def initial(self, request, *args, **kwargs):
+        """Сверка справочников жанров и категорий раз в запрос."""
+        refresh_catalog()
+        super().initial(request, *args, **kwargs)
+
+    def get_etag_version(self):
+        return f'{categories.version}:{genres.version}'
+
+    def get_cache_tags(self):
+        if self.action == 'retrieve':
+            return (f'title:{self.kwargs["pk"]}', 'categories', 'genres')
+        return ('titles', 'categories', 'genres')
+
+    def list(self, request, *args, **kwargs):
+        """Список произведений; ?facets=genre,category,year - со сводкой."""
+        facets = request.query_params.get('facets')
+        if facets:
+            facets = title_facets(
+                self.filter_queryset(Title.objects.all()),
+                [name for name in facets.split(',') if name]
+            )
+        response = super().list(request, *args, **kwargs)
+        if facets:
+            response.data['facets'] = facets
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        """Произведение из кеша представлений, как и в списке."""
+        serializer = self.get_serializer([self.get_object()], many=True)
+        return Response(serializer.data[0])
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return TitleSerializer
+        if self.action == 'top':
+            return TopTitleSerializer
+        if self.action == 'scores':
+            return TitleScoresSerializer
         return TitleWriteSerializer
 
+    @action(detail=False, url_path='top')
+    def top(self, request):
+        """Рейтинг произведений с учетом количества отзывов."""
+        category = request.query_params.get('category')
+        genre = request.query_params.get('genre')
+        ranks = TitleRank.objects.select_related('title')
+        if genre:
+            ranks = ranks.filter(scope='genre', genre__slug=genre)
+            if category:
+                ranks = ranks.filter(title__category__slug=category)
+        elif category:
+            ranks = ranks.filter(scope='category', category__slug=category)
+        else:
+            ranks = ranks.filter(scope='all')
+        page = self.paginate_queryset(
+            ranks.order_by('-weighted_rating', 'title')
+        )
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True)
+    def scores(self, request, pk=None):
+        """Распределение оценок произведения, медиана и перцентили."""
+        title = get_object_or_404(
+            Title.objects.only('id', 'review_count'), pk=pk
+        )
+        return Response(self.get_serializer(title).data)
+
 
 class ReviewViewSet(CommentReviewViewSet):
     """Представление для отзывов."""
 
     serializer_class = ReviewSerializer
+    cache_response_actions = ('list',)
+    response_cache_timeout = 5 * 60
+    stale_while_revalidate = 30
 
     def get_title(self):
-        """Получение произведения из аргумента URL."""
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+        """Произведение из аргумента URL, одно на запрос."""
+        if not hasattr(self, '_title'):
+            title_id = int(self.kwargs['title_id'])
+            self._title = missing_titles.get_object_or_404(
+                title_id, Title, pk=title_id
+            )
+        return self._title
+
+    get_parent = get_title
+
+    def get_cache_tags(self):
+        return (f'title:{self.kwargs["title_id"]}:reviews', 'authors')
 
     def get_queryset(self):
-        """Переопределение функции для фильтрации обзоров по произведению."""
-        title = self.get_title()
-        return title.reviews.all().order_by('pub_date')
+        """
+        Отзывы произведения по id из URL, без загрузки произведения;
+        авторы загружаются тем же запросом.
+        """
+        title_id = int(self.kwargs['title_id'])
+        missing_titles.check(title_id)
+        return Review.objects.filter(title_id=title_id).select_related(
+            'author'
+        ).order_by('pub_date', 'id')
 
     def perform_create(self, serializer):
         """Переопределение функции для добавления атрибутов."""
@@ -128,26 +241,37 @@ class ReviewViewSet(CommentReviewViewSet):
             title=self.get_title()
         )
 
-    def perform_update(self, serializer):
-        """Переопределение функции для обновления атрибутов."""
-        serializer.save(title=self.get_title())
-
 
 class CommentViewSet(CommentReviewViewSet):
     """Представление для комментариев."""
 
     serializer_class = CommentSerializer
+    cache_response_actions = ('list',)
+
+    def review_key(self):
+        return int(self.kwargs['title_id']), int(self.kwargs['review_id'])
 
     def get_review(self):
-        """Получение обзора из аргумента URL."""
-        review_id = self.kwargs.get('review_id')
-        title_id = self.kwargs.get('title_id')
-        return get_object_or_404(Review, pk=review_id, title=title_id)
+        """Отзыв из аргументов URL, один на запрос."""
+        if not hasattr(self, '_review'):
+            key = self.review_key()
+            self._review = missing_reviews.get_object_or_404(
+                key, Review, title=key[0], pk=key[1]
+            )
+        return self._review
+
+    get_parent = get_review
+
+    def get_cache_tags(self):
+        return (f'review:{self.kwargs["review_id"]}:comments', 'authors')
 
     def get_queryset(self):
-        """Переопределение функции для фильтрации комментариев по посту."""
-        review = self.get_review()
-        return review.comments.all().order_by('pub_date')
+        """Комментарии к отзыву произведения из URL вместе с авторами."""
+        title_id, review_id = self.review_key()
+        missing_reviews.check((title_id, review_id))
+        return Comment.objects.filter(
+            review_id=review_id, review__title_id=title_id
+        ).select_related('author').order_by('pub_date', 'id')
 
     def perform_create(self, serializer):
         """Переопределение функции для добавления атрибутов."""
@@ -155,7 +279,3 @@ class CommentViewSet(CommentReviewViewSet):
             author=self.request.user,
             review=self.get_review()
         )
-
-    def perform_update(self, serializer):
-        """Переопределение функции для обновления атрибутов."""
-        serializer.save(review=self.get_review())
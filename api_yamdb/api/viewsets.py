@@ -1,11 +1,17 @@
 from rest_framework import filters, mixins, viewsets
-from rest_framework.pagination import LimitOffsetPagination
 
+from .cache import tag_versions
+from .mixins import (ConditionalGetMixin, ResponseCacheMixin,
+                     SparseFieldsMixin)
+from .pagination import (CURSOR_QUERY_PARAM, KeysetPagination,
+                         LimitOffsetPagination)
 from .permissions import (IsAdminModerAuthorOrReadOnly,
                           IsAdminOrReadOnly)
 
 
 class UsersGenericViewSet(
+    ConditionalGetMixin,
+    SparseFieldsMixin,
     mixins.RetrieveModelMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
@@ -17,6 +23,7 @@ class UsersGenericViewSet(
 
 
 class CategoryGenreViewset(
+    ResponseCacheMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
@@ -32,6 +39,8 @@ class CategoryGenreViewset(
 
 
 class TitleManagementViewSet(
+    ResponseCacheMixin,
+    SparseFieldsMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.RetrieveModelMixin,
@@ -43,6 +52,8 @@ class TitleManagementViewSet(
 
 
 class CommentReviewViewSet(
+    ResponseCacheMixin,
+    SparseFieldsMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.RetrieveModelMixin,
@@ -50,7 +61,49 @@ class CommentReviewViewSet(
     mixins.UpdateModelMixin,
     viewsets.GenericViewSet
 ):
-    """Вьюсет для управления объектами моделей Comment и Review."""
+    """
+    Вьюсет для управления объектами моделей Comment и Review.
+    Наследник задает get_parent() - родительский объект из URL,
+    загружаемый один раз за запрос.
+    """
 
     permission_classes = (IsAdminModerAuthorOrReadOnly,)
     http_method_names = ['get', 'post', 'patch', 'delete']
+    sparse_field_paths = {'author': ('author', 'author__username')}
+
+    @property
+    def paginator(self):
+        """Постраничный вывод по курсору, если передан ?cursor=."""
+        if (
+            not hasattr(self, '_paginator')
+            and CURSOR_QUERY_PARAM in self.request.query_params
+        ):
+            self._paginator = KeysetPagination()
+        return super().paginator
+
+    def get_etag_version(self):
+        # Переименование автора не меняет updated_at отзывов и комментариев.
+        versions = getattr(self, 'tag_versions', None) or tag_versions(
+            ('authors',)
+        )
+        return versions['authors']
+
+    def get_list_state(self, queryset):
+        # Выборка фильтруется по id из URL без отдельного запроса
+        # родителя, поэтому пустой список нужно отличить от 404.
+        last_modified, count = super().get_list_state(queryset)
+        if not count:
+            self.get_parent()
+        return last_modified, count
+
+    def get_page_validators(self, page):
+        # Пустая страница без родителя - 404, а не 304.
+        if not page:
+            self.get_parent()
+        return super().get_page_validators(page)
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page:
+            self.get_parent()
+        return page
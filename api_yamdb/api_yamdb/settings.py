@@ -79,6 +79,85 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# default - кеш процесса. Общие для всех процессов кеши: responses -
+# готовые ответы анонимным пользователям (его же заполняет warm_cache
+# перед запуском), users - пользователи для аутентификации по JWT,
+# tags - метки версий тегов кеша ответов (по тегу на произведение и
+# отзыв, вытеснение метки лишь сбрасывает ее ответы), versions - метки
+# версий, которые вытесняться не должны (справочники жанров и
+# категорий, кеш отсутствующих объектов, общее среднее рейтинга,
+# метрики): их немного.
+# При запуске на нескольких серверах общие кеши нужно перенести в
+# DatabaseCache или Memcached.
+CACHES = {
+    'default': {
+        'BACKEND': 'reviews.cache_backends.LocMemCache',
+        'METRICS_NAME': 'default',
+    },
+    'responses': {
+        'BACKEND': 'reviews.cache_backends.FileBasedCache',
+        'METRICS_NAME': 'responses',
+        'LOCATION': BASE_DIR / 'cache' / 'responses',
+        # Каталог с 10000 файлов просматривается раз в 100 записей.
+        'OPTIONS': {'MAX_ENTRIES': 10000, 'CULL_EVERY': 100},
+    },
+    'users': {
+        'BACKEND': 'reviews.cache_backends.FileBasedCache',
+        'METRICS_NAME': 'users',
+        'LOCATION': BASE_DIR / 'cache' / 'users',
+        # Запись и метка версии на пользователя: до 50000 активных.
+        'OPTIONS': {'MAX_ENTRIES': 100000, 'CULL_EVERY': 1000},
+    },
+    'tags': {
+        'BACKEND': 'reviews.cache_backends.FileBasedCache',
+        'METRICS_NAME': 'tags',
+        'LOCATION': BASE_DIR / 'cache' / 'tags',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 100000, 'CULL_EVERY': 1000},
+    },
+    'versions': {
+        'BACKEND': 'reviews.cache_backends.FileBasedCache',
+        'METRICS_NAME': 'versions',
+        'LOCATION': BASE_DIR / 'cache' / 'versions',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+CATALOG_VERSION_CACHE = 'versions'
+# Кеш готовых представлений произведений: ключ включает версию
+# произведения, поэтому устаревшие записи просто перестают читаться.
+TITLE_REPRESENTATION_CACHE = 'default'
+TITLE_REPRESENTATION_TIMEOUT = 60 * 60 * 24
+# Кеш ответов сбрасывается по тегам, метки версий тегов хранятся в
+# общем кеше; срок свежести страхует от изменений в обход сигналов
+# (вьюсеты могут задать свой).
+RESPONSE_CACHE = 'responses'
+RESPONSE_CACHE_TAGS = 'tags'
+RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+# Пользователь из токена берется из кеша; любое изменение или удаление
+# пользователя меняет метку его версии, и запись перестает читаться.
+# Срок хранения - страховка от изменений в обход модели (queryset.update).
+AUTH_USER_CACHE = 'users'
+AUTH_USER_CACHE_TIMEOUT = 5 * 60
+# Кеш отсутствующих произведений и отзывов в памяти процесса для 404
+# вложенных адресов без запроса к базе; метки версий, которые меняет
+# создание объекта, общие для всех процессов.
+NEGATIVE_CACHE_SIZE = 10000
+NEGATIVE_CACHE_TIMEOUT = 60
+NEGATIVE_CACHE_VERSIONS = 'versions'
+# Метрики кешей: снимок каждого процесса публикуется в общий кеш не
+# чаще раза в METRICS_PUBLISH_INTERVAL секунд и хранится METRICS_TIMEOUT.
+METRICS_CACHE = 'versions'
+METRICS_PUBLISH_INTERVAL = 10
+METRICS_TIMEOUT = 60 * 60
+# Приблизительное количество записей для пагинации с ?count=approximate
+# хранится в кеше процесса PAGINATION_COUNT_TIMEOUT секунд.
+PAGINATION_COUNT_CACHE = 'default'
+PAGINATION_COUNT_TIMEOUT = 60
+# Дополнительные адреса для manage.py warm_cache.
+WARM_CACHE_PATHS = ()
+
+
 LANGUAGE_CODE = 'ru-ru'
 
 TIME_ZONE = 'UTC'
@@ -98,14 +177,14 @@ AUTH_USER_MODEL = 'reviews.YamdbUser'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
 
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
 }
 
@@ -116,3 +195,8 @@ SIMPLE_JWT = {
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 COMPANY_EMAIL_ADRESS = 'email@email.ru'
+
+# Байесовский рейтинг /api/v1/titles/top/: вес общего среднего в отзывах
+# и общий кеш, где общее среднее хранится до следующего полного пересчета.
+TOP_TITLES_MIN_REVIEWS = 5
+TOP_TITLES_MEAN_CACHE = 'versions'
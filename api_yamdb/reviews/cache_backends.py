@@ -0,0 +1,104 @@
+import itertools
+import os
+import random
+
+from django.core.cache.backends import filebased, locmem
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.files import locks
+
+from .metrics import metrics
+
+
+class MeteredCacheMixin:
+    """
+    Бэкенд кеша с учетом вытесненных записей (слой backend метрик) и
+    размером в stats(). Имя в метриках - ключ METRICS_NAME настроек.
+    """
+
+    # Общий для процессов бэкенд считается один раз, а не по процессам.
+    shared = True
+
+    def __init__(self, location, params):
+        self.metrics_name = params.pop('METRICS_NAME', location)
+        super().__init__(location, params)
+
+    def record_evicted(self, count):
+        # Вызывается из _cull под блокировкой бэкенда: публикация снимка
+        # отсюда снова взяла бы ее в stats().
+        if count:
+            metrics.add('backend', 'evicted', self.metrics_name, count)
+
+
+class LocMemCache(MeteredCacheMixin, locmem.LocMemCache):
+    shared = False
+
+    def _cull(self):
+        before = len(self._cache)
+        super()._cull()
+        self.record_evicted(before - len(self._cache))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._cache),
+                'bytes': sum(len(value) for value in self._cache.values()),
+            }
+
+
+class FileBasedCache(MeteredCacheMixin, filebased.FileBasedCache):
+    """
+    Файловый кеш, который проверяет MAX_ENTRIES не на каждой записи, а
+    на каждой OPTIONS['CULL_EVERY']-й записи процесса: проверка читает
+    весь каталог кеша. add() атомарен для процессов одного сервера.
+    """
+
+    lock_filename = 'add.lock'
+
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self._cull_every = params.get('OPTIONS', {}).get('CULL_EVERY', 1)
+        self._writes = itertools.count(1)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        has_key() и set() родительского add() под блокировкой файла в
+        каталоге кеша: иначе несколько процессов могут добавить ключ
+        одновременно. Между серверами атомарность дают только общие
+        бэкенды (Memcached, Redis, DatabaseCache).
+        """
+        self._createdir()
+        with open(os.path.join(self._dir, self.lock_filename), 'ab') as lock:
+            locks.lock(lock, locks.LOCK_EX)
+            try:
+                return super().add(key, value, timeout, version)
+            finally:
+                locks.unlock(lock)
+
+    def _cull(self):
+        if next(self._writes) % self._cull_every:
+            return
+        # Повторяет FileBasedCache._cull, запоминая число удаленных файлов.
+        filelist = self._list_cache_files()
+        num_entries = len(filelist)
+        if num_entries < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            self.clear()
+            self.record_evicted(num_entries)
+            return
+        filelist = random.sample(
+            filelist, int(num_entries / self._cull_frequency)
+        )
+        for fname in filelist:
+            self._delete(fname)
+        self.record_evicted(len(filelist))
+
+    def stats(self):
+        entries = size = 0
+        for fname in self._list_cache_files():
+            try:
+                size += os.path.getsize(fname)
+            except FileNotFoundError:
+                continue
+            entries += 1
+        return {'entries': entries, 'bytes': size}
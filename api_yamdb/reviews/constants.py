@@ -2,3 +2,9 @@ EMAIL_MAX_LENGTH = 254
 CHARFIELD_MAX_LENGTH = 150
 NAME_MAX_LENGTH = 256
 SLUG_MAX_LENGTH = 50
+RANK_SCOPES = [
+    ('all', 'Все произведения'),
+    ('category', 'Категория'),
+    ('genre', 'Жанр')
+]
+RANK_SCOPE_MAX_LENGTH = 10
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import Title
+from reviews.search import index_available, rebuild_index
+
+
+class Command(BaseCommand):
+    """Перестроение полнотекстового индекса произведений."""
+
+    help = (
+        'Заново заполняет индекс FTS5 по названиям и описаниям '
+        'произведений, например после массового импорта.'
+    )
+
+    def handle(self, *args, **options):
+        if not index_available():
+            self.stdout.write(self.style.WARNING(
+                'Полнотекстовый индекс недоступен в этой базе, '
+                'поиск работает по подстроке.'
+            ))
+            return
+        count = rebuild_index(Title.objects.all())
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано произведений: {count}.'
+        ))
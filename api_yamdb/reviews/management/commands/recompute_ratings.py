@@ -0,0 +1,191 @@
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.cache import purge_tags
+from api.constants import SCORE_MAX_VALUE, SCORE_MIN_VALUE
+from reviews.models import Review, ScoreCount, Title
+from reviews.ranking import rebuild_ranking
+from reviews.ratings import bump_title_versions
+
+SCORE_SPAN = SCORE_MAX_VALUE - SCORE_MIN_VALUE + 1
+FIX_BATCH_SIZE = 500
+
+
+def iterate_chunks(queryset, fields, chunk_size):
+    """
+    Постраничная выгрузка values_list по первичному ключу без OFFSET.
+    Первым полем в fields должен быть 'pk'.
+    """
+    last_pk = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk').values_list(
+                *fields
+            )[:chunk_size]
+        )
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        yield np.array(rows, dtype=np.int64)
+
+
+class RatingTotals:
+    """Суммы, количества и гистограммы оценок по id произведения."""
+
+    def __init__(self, size):
+        self.score_sum = np.zeros(size, dtype=np.int64)
+        self.review_count = np.zeros(size, dtype=np.int64)
+        self.histogram = np.zeros((size, SCORE_SPAN), dtype=np.int64)
+
+    def add_reviews(self, title_ids, scores):
+        """Добавляет пачку пар (id произведения, оценка)."""
+        size = len(self.score_sum)
+        self.score_sum += np.bincount(
+            title_ids, weights=scores, minlength=size
+        ).astype(np.int64)
+        self.review_count += np.bincount(title_ids, minlength=size)
+        in_range = (scores >= SCORE_MIN_VALUE) & (scores <= SCORE_MAX_VALUE)
+        # Поячеечное сложение без временной матрицы размером с гистограмму.
+        np.add.at(
+            self.histogram,
+            (title_ids[in_range], scores[in_range] - SCORE_MIN_VALUE),
+            1
+        )
+        return int((~in_range).sum())
+
+    def histogram_of(self, title_id):
+        """Гистограмма произведения в виде {оценка: количество}."""
+        return {
+            int(index) + SCORE_MIN_VALUE: int(count)
+            for index, count in enumerate(self.histogram[title_id])
+            if count
+        }
+
+
+class Command(BaseCommand):
+    """Пересчет счетчиков рейтинга произведений по всем отзывам."""
+
+    help = (
+        'Пересчитывает суммы оценок, количество отзывов и гистограммы '
+        'оценок произведений, сообщает о расхождениях с сохраненными '
+        'значениями и с --fix исправляет их.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=100_000,
+            help='Количество строк, читаемых из базы за один запрос.'
+        )
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Записать пересчитанные значения в базу.'
+        )
+        parser.add_argument(
+            '--show', type=int, default=20,
+            help='Сколько расхождений вывести подробно.'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_title = Title.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first()
+        if last_title is None:
+            self.stdout.write('Произведений нет.')
+            return
+        size = last_title + 1
+
+        # Произведения, созданные во время пересчета, в него не попадают.
+        actual = RatingTotals(size)
+        reviews = out_of_range = 0
+        for rows in iterate_chunks(
+            Review.objects.filter(title_id__lt=size),
+            ('pk', 'title_id', 'score'), chunk_size
+        ):
+            out_of_range += actual.add_reviews(rows[:, 1], rows[:, 2])
+            reviews += len(rows)
+
+        stored = RatingTotals(size)
+        title_ids = []
+        for rows in iterate_chunks(
+            Title.objects.filter(pk__lt=size),
+            ('pk', 'score_sum', 'review_count'),
+            chunk_size
+        ):
+            title_ids.append(rows[:, 0])
+            stored.score_sum[rows[:, 0]] = rows[:, 1]
+            stored.review_count[rows[:, 0]] = rows[:, 2]
+        title_ids = np.concatenate(title_ids)
+        for rows in iterate_chunks(
+            ScoreCount.objects.filter(
+                title_id__lt=size,
+                score__gte=SCORE_MIN_VALUE, score__lte=SCORE_MAX_VALUE
+            ),
+            ('pk', 'title_id', 'score', 'count'), chunk_size
+        ):
+            stored.histogram[
+                rows[:, 1], rows[:, 2] - SCORE_MIN_VALUE
+            ] = rows[:, 3]
+
+        drifted = title_ids[
+            (actual.score_sum[title_ids] != stored.score_sum[title_ids])
+            | (actual.review_count[title_ids]
+               != stored.review_count[title_ids])
+            | (actual.histogram[title_ids]
+               != stored.histogram[title_ids]).any(axis=1)
+        ]
+        self.stdout.write(
+            f'Отзывов: {reviews}, произведений: {len(title_ids)}, '
+            f'с расхождениями: {len(drifted)}.'
+        )
+        if out_of_range:
+            self.stdout.write(self.style.WARNING(
+                f'Отзывов с оценкой вне диапазона {SCORE_MIN_VALUE}-'
+                f'{SCORE_MAX_VALUE}: {out_of_range}.'
+            ))
+        for title_id in drifted[:options['show']]:
+            self.stdout.write(
+                f'  {title_id}: сумма {stored.score_sum[title_id]} -> '
+                f'{actual.score_sum[title_id]}, отзывов '
+                f'{stored.review_count[title_id]} -> '
+                f'{actual.review_count[title_id]}'
+            )
+        if options['fix'] and len(drifted):
+            for start in range(0, len(drifted), FIX_BATCH_SIZE):
+                self.fix(actual, drifted[start:start + FIX_BATCH_SIZE])
+            rebuild_ranking()
+            self.stdout.write(self.style.SUCCESS(
+                f'Исправлено произведений: {len(drifted)}.'
+            ))
+
+    def fix(self, actual, title_ids):
+        """
+        Записывает пересчитанные значения пачкой произведений и
+        сбрасывает их представления в кешах.
+        """
+        titles = []
+        counters = []
+        for title_id in title_ids.tolist():
+            score_sum = int(actual.score_sum[title_id])
+            review_count = int(actual.review_count[title_id])
+            titles.append(Title(
+                pk=title_id,
+                score_sum=score_sum,
+                review_count=review_count,
+                rating=score_sum / review_count if review_count else None
+            ))
+            counters.extend(
+                ScoreCount(title_id=title_id, score=score, count=count)
+                for score, count in actual.histogram_of(title_id).items()
+            )
+        with transaction.atomic():
+            Title.objects.bulk_update(
+                titles, ('score_sum', 'review_count', 'rating')
+            )
+            ScoreCount.objects.filter(title_id__in=title_ids.tolist()).delete()
+            ScoreCount.objects.bulk_create(counters, batch_size=FIX_BATCH_SIZE)
+            bump_title_versions(title_ids.tolist())
+        purge_tags(
+            ['titles'] + [f'title:{title_id}' for title_id in title_ids]
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from reviews.ranking import rebuild_ranking
+
+
+class Command(BaseCommand):
+    """Полный пересчет рейтинга /api/v1/titles/top/."""
+
+    help = (
+        'Перестраивает таблицу взвешенного рейтинга произведений '
+        'с актуальной средней оценкой по сервису.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество строк рейтинга в одном INSERT.'
+        )
+
+    def handle(self, *args, **options):
+        count, mean = rebuild_ranking(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг обновлен: произведений {count}, '
+            f'средняя оценка {mean:.3f}.'
+        ))
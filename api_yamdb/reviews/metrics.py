@@ -0,0 +1,185 @@
+import os
+import socket
+import threading
+from collections import defaultdict
+from time import monotonic, time
+
+from django.conf import settings
+from django.core.cache import caches
+
+PROCESSES_KEY = 'metrics:process_published'
+
+
+class Metrics:
+    """
+    Счетчики и длительности кешей в памяти процесса с разбивкой по
+    слою кеша и эндпоинту (basename вьюсета). Раз в
+    settings.METRICS_PUBLISH_INTERVAL секунд снимок публикуется в общий
+    кеш settings.METRICS_CACHE, откуда collect() собирает данные всех
+    процессов.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = defaultdict(int)
+        self.timings = {}
+        self.published = None
+
+    @property
+    def process_key(self):
+        return f'metrics:process:{socket.gethostname()}:{os.getpid()}'
+
+    def incr(self, layer, name, basename='', value=1):
+        self.add(layer, name, basename, value)
+        self.maybe_publish()
+
+    def add(self, layer, name, basename='', value=1):
+        """
+        Увеличивает счетчик без публикации снимка: для вызовов под
+        блокировками бэкендов кеша, которые читает publish().
+        """
+        with self._lock:
+            self.counters[layer, basename, name] += value
+
+    def timing(self, layer, name, basename, milliseconds):
+        """Количество, сумма и максимум длительностей в мс."""
+        with self._lock:
+            count, total, peak = self.timings.get(
+                (layer, basename, name), (0, 0.0, 0.0)
+            )
+            self.timings[layer, basename, name] = (
+                count + 1, total + milliseconds, max(peak, milliseconds)
+            )
+        self.maybe_publish()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'timings': dict(self.timings),
+            }
+
+    def clear(self):
+        with self._lock:
+            self.counters.clear()
+            self.timings.clear()
+
+    def maybe_publish(self):
+        if (
+            self.published is None
+            or monotonic() - self.published
+            >= settings.METRICS_PUBLISH_INTERVAL
+        ):
+            self.publish()
+
+    def publish(self):
+        """Сохраняет снимок процесса в общий кеш."""
+        self.published = monotonic()
+        store = caches[settings.METRICS_CACHE]
+        key = self.process_key
+        snapshot = self.snapshot()
+        snapshot['backends'] = backend_stats(shared=False)
+        store.set(key, snapshot, settings.METRICS_TIMEOUT)
+        # Процессы со временем последней публикации; давно молчащие
+        # удаляются. Запись, потерянная при одновременной публикации,
+        # вернется со следующим снимком процесса.
+        now = time()
+        processes = {
+            process: published
+            for process, published in store.get(PROCESSES_KEY, {}).items()
+            if now - published < settings.METRICS_TIMEOUT
+        }
+        processes[key] = now
+        store.set(PROCESSES_KEY, processes, settings.METRICS_TIMEOUT)
+
+
+metrics = Metrics()
+
+
+def backend_stats(shared):
+    """Записи и байты бэкендов кеша, общих для процессов или нет."""
+    return {
+        alias: caches[alias].stats()
+        for alias in settings.CACHES
+        if hasattr(caches[alias], 'stats')
+        and caches[alias].shared == shared
+    }
+
+
+def merge_snapshots(snapshots):
+    """Сумма снимков: счетчики складываются, максимумы - наибольшие."""
+    counters, timings = defaultdict(int), {}
+    backends = defaultdict(lambda: {'entries': 0, 'bytes': 0})
+    for snapshot in snapshots:
+        for alias, stats in snapshot.get('backends', {}).items():
+            for name, value in stats.items():
+                backends[alias][name] += value
+        for key, value in snapshot['counters'].items():
+            counters[key] += value
+        for key, (count, total, peak) in snapshot['timings'].items():
+            old_count, old_total, old_peak = timings.get(key, (0, 0.0, 0.0))
+            timings[key] = (
+                old_count + count, old_total + total, max(old_peak, peak)
+            )
+    return {
+        'counters': dict(counters),
+        'timings': timings,
+        'backends': dict(backends),
+    }
+
+
+def collect():
+    """Метрики всех процессов, опубликовавших снимок."""
+    metrics.publish()
+    store = caches[settings.METRICS_CACHE]
+    snapshots = store.get_many(store.get(PROCESSES_KEY, {}))
+    merged = merge_snapshots(snapshots.values())
+    merged['backends'].update(backend_stats(shared=True))
+    merged['processes'] = len(snapshots)
+    return merged
+
+
+def report():
+    """
+    Метрики всех процессов по слоям и эндпоинтам: счетчики, доля
+    попаданий, длительности (количество, среднее и максимум в мс) и
+    размер бэкендов кеша с числом вытесненных записей.
+    """
+    collected = collect()
+    layers = defaultdict(lambda: defaultdict(dict))
+    for (layer, basename, name), value in collected['counters'].items():
+        layers[layer][basename or '-'][name] = value
+    for (layer, basename, name), (count, total, peak) in (
+        collected['timings'].items()
+    ):
+        layers[layer][basename or '-'][name] = {
+            'count': count,
+            'avg': round(total / count, 3),
+            'max': round(peak, 3),
+        }
+    for endpoints in layers.values():
+        for values in endpoints.values():
+            lookups = values.get('hits', 0) + values.get('misses', 0)
+            if lookups:
+                values['hit_ratio'] = round(values.get('hits', 0) / lookups, 4)
+    backends = {
+        alias: {
+            **stats,
+            'evicted': layers.get('backend', {}).get(alias, {}).get(
+                'evicted', 0
+            ),
+        }
+        for alias, stats in collected['backends'].items()
+    }
+    layers.pop('backend', None)
+    return {
+        'processes': collected['processes'],
+        'layers': {
+            layer: {
+                basename: values
+                for basename, values in sorted(endpoints.items())
+            }
+            for layer, endpoints in sorted(layers.items())
+        },
+        'backends': backends,
+    }
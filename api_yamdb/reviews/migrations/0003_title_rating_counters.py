@@ -0,0 +1,43 @@
+# Generated by Django 3.2 on 2026-10-18 05:57
+
+from django.db import migrations, models
+
+
+def fill_rating_counters(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    totals = Review.objects.values('title').annotate(
+        score_sum=models.Sum('score'), review_count=models.Count('id')
+    ).order_by()
+    for row in totals:
+        Title.objects.filter(pk=row['title']).update(
+            score_sum=row['score_sum'],
+            review_count=row['review_count'],
+            rating=row['score_sum'] / row['review_count']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_auto_20241031_1935'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, default=None, editable=False, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_rating_counters, migrations.RunPython.noop),
+    ]
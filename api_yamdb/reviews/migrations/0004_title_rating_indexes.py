@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-18 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_title_rating_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, db_index=True, default=None, editable=False, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='review_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+    ]
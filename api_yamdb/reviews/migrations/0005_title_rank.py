@@ -0,0 +1,33 @@
+# Generated by Django 3.2 on 2026-10-18 06:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_title_rating_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRank',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('all', 'Все произведения'), ('category', 'Категория'), ('genre', 'Жанр')], max_length=10)),
+                ('weighted_rating', models.FloatField(verbose_name='Взвешенный рейтинг')),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.category')),
+                ('genre', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.genre')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ranks', to='reviews.title')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Рейтинг произведений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titlerank',
+            index=models.Index(fields=['scope', 'category', 'genre', '-weighted_rating', 'title'], name='title_rank_scope_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.2 on 2026-10-18 06:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_score_counts(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    ScoreCount = apps.get_model('reviews', 'ScoreCount')
+    ScoreCount.objects.bulk_create(
+        ScoreCount(title_id=row['title'], score=row['score'], count=row['total'])
+        for row in Review.objects.values('title', 'score').annotate(
+            total=models.Count('id')
+        ).order_by()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_rank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveSmallIntegerField(verbose_name='Оценка')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_counts', to='reviews.title')),
+            ],
+            options={
+                'verbose_name': 'Счетчик оценок',
+                'verbose_name_plural': 'Счетчики оценок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='scorecount',
+            constraint=models.UniqueConstraint(fields=('title', 'score'), name='unique_title_score'),
+        ),
+        migrations.RunPython(fill_score_counts, migrations.RunPython.noop),
+    ]
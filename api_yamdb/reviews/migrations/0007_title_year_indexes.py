@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-18 06:07
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_title_score_counts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='year',
+            field=models.IntegerField(db_index=True, help_text='Введите год не позднее текущего.', validators=[django.core.validators.MaxValueValidator(2024)]),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'year'], name='title_category_year_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from reviews.search import FTS_COLUMNS, FTS_TABLE, create_index, drop_index
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if not create_index(connection):
+        return
+    Title = apps.get_model('reviews', 'Title')
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, {", ".join(FTS_COLUMNS)}) '
+            'VALUES (%s, %s, %s)',
+            list(Title.objects.values_list('id', *FTS_COLUMNS))
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_year_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 06:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Растет при любом изменении произведения, его жанров и отзывов.', verbose_name='Версия'),
+        ),
+    ]
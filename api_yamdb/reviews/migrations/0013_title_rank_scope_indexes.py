@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-18 07:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='titlerank',
+            name='title_rank_scope_idx',
+        ),
+        migrations.AddIndex(
+            model_name='titlerank',
+            index=models.Index(fields=['scope', '-weighted_rating', 'title'], name='title_rank_all_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titlerank',
+            index=models.Index(fields=['scope', 'category', '-weighted_rating', 'title'], name='title_rank_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titlerank',
+            index=models.Index(fields=['scope', 'genre', '-weighted_rating', 'title'], name='title_rank_genre_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0013_title_rank_scope_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['updated_at'], name='title_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='yamdbuser',
+            index=models.Index(fields=['updated_at'], name='user_updated_at_idx'),
+        ),
+    ]
@@ -25,3 +25,11 @@ class NameSlugMixin(models.Model):
 
     class Meta:
         abstract = True
+
+
+class UpdatedAtMixin(models.Model):
+    """Миксин для моделей с датой последнего изменения."""
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    class Meta:
+        abstract = True
@@ -1,12 +1,15 @@
 from datetime import datetime
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator
-from django.db import models
+from django.db import models, transaction
 
-from .constants import (CHARFIELD_MAX_LENGTH, NAME_MAX_LENGTH)
-from .mixins import NameSlugMixin
+from .constants import (CHARFIELD_MAX_LENGTH, NAME_MAX_LENGTH,
+                        RANK_SCOPE_MAX_LENGTH, RANK_SCOPES)
+from .mixins import NameSlugMixin, UpdatedAtMixin
 
 current_year = datetime.now().year
+# Поля произведения, которые меняются только через F() в UPDATE.
+TITLE_COUNTER_FIELDS = ('score_sum', 'review_count', 'rating', 'version')
 
 ROLES = [
     ('user', 'Пользователь'),
@@ -15,13 +18,21 @@ ROLES = [
 ]
 
 
-class YamdbUser(AbstractUser):
+class YamdbUser(AbstractUser, UpdatedAtMixin):
     """Кастомизация модели пользователя сервиса YaMDB."""
 
     bio = models.TextField(blank=True)
     role = models.CharField(choices=ROLES, default='user',
                             max_length=CHARFIELD_MAX_LENGTH)
 
+    class Meta(AbstractUser.Meta):
+        """Метаданные пользователя."""
+
+        # MAX(updated_at) и COUNT валидаторов списка - по индексу.
+        indexes = [
+            models.Index(fields=['updated_at'], name='user_updated_at_idx'),
+        ]
+
     @property
     def is_admin(self):
         """Возвращает True, если пользователь Админ или Суперпользователь."""
@@ -33,7 +44,7 @@ class YamdbUser(AbstractUser):
         return self.role == 'moderator'
 
 
-class Category(NameSlugMixin):
+class Category(NameSlugMixin, UpdatedAtMixin):
     """Модель для категорий."""
 
     class Meta:
@@ -47,7 +58,7 @@ class Category(NameSlugMixin):
         return self.name
 
 
-class Genre(NameSlugMixin):
+class Genre(NameSlugMixin, UpdatedAtMixin):
     """Модель для жанров."""
 
     class Meta:
@@ -61,30 +72,70 @@ class Genre(NameSlugMixin):
         return self.name
 
 
-class Title(models.Model):
+class Title(UpdatedAtMixin):
     """Модель для произведений."""
 
     name = models.CharField(max_length=NAME_MAX_LENGTH)
     year = models.IntegerField(
         validators=[MaxValueValidator(current_year)],
-        help_text='Введите год не позднее текущего.'
+        help_text='Введите год не позднее текущего.',
+        db_index=True
     )
     description = models.TextField(blank=True)
     genre = models.ManyToManyField(Genre)
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    score_sum = models.PositiveIntegerField(
+        'Сумма оценок', default=0, editable=False
+    )
+    review_count = models.PositiveIntegerField(
+        'Количество отзывов', default=0, editable=False, db_index=True
+    )
+    rating = models.FloatField(
+        'Рейтинг', null=True, blank=True, default=None, editable=False,
+        db_index=True
+    )
+    version = models.PositiveIntegerField(
+        'Версия', default=0, editable=False,
+        help_text='Растет при любом изменении произведения, его жанров '
+                  'и отзывов.'
+    )
 
     class Meta:
         """Метаданные отзыва."""
 
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(
+                fields=['category', 'year'],
+                name='title_category_year_idx'
+            ),
+            # Список произведений по умолчанию отсортирован по названию.
+            models.Index(fields=['name'], name='title_name_idx'),
+            # MAX(updated_at) и COUNT валидаторов списка - по индексу.
+            models.Index(fields=['updated_at'], name='title_updated_at_idx'),
+        ]
 
     def __str__(self):
         """Строковое представление класса."""
         return self.name
 
-
-class Review(models.Model):
+    def save(self, *args, **kwargs):
+        """
+        Обычное сохранение не пишет счетчики рейтинга и версию: их меняют
+        только атомарные UPDATE с F() из сигналов, и значения в памяти
+        могут быть устаревшими.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            skipped = set(TITLE_COUNTER_FIELDS) | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+
+class Review(UpdatedAtMixin):
     """Модель для отзывов."""
 
     text = models.TextField()
@@ -109,13 +160,66 @@ class Review(models.Model):
                 name='unique_author_title'
             )
         ]
+        # Страницы отзывов произведения по ключу (pub_date, id) и отзывы
+        # пользователя по дате.
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='review_author_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         """Строковое представление класса."""
         return self.text
 
+    def save(self, *args, **kwargs):
+        """
+        Отзыв и счетчики оценок произведения (сигналы reviews.signals)
+        записываются одной транзакцией.
+        """
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """Удаление вместе с пересчетом счетчиков одной транзакцией."""
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+
+class ScoreCount(models.Model):
+    """Количество отзывов с данной оценкой у произведения."""
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='score_counts'
+    )
+    score = models.PositiveSmallIntegerField('Оценка')
+    count = models.PositiveIntegerField('Количество отзывов', default=0)
+
+    class Meta:
+        """Метаданные счетчика оценок."""
+
+        verbose_name = 'Счетчик оценок'
+        verbose_name_plural = 'Счетчики оценок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'score'],
+                name='unique_title_score'
+            )
+        ]
+
+    def __str__(self):
+        """Строковое представление класса."""
+        return f'{self.title_id}: {self.score} x {self.count}'
+
 
-class Comment(models.Model):
+class Comment(UpdatedAtMixin):
     """Модель для комментариев."""
 
     text = models.TextField()
@@ -144,3 +248,65 @@ class Comment(models.Model):
 
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        # Страницы комментариев к отзыву по ключу (pub_date, id).
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx'
+            ),
+        ]
+
+
+class TitleRank(models.Model):
+    """
+    Предрассчитанный взвешенный рейтинг произведения.
+    Для каждого произведения с отзывами хранится строка в общем рейтинге,
+    в рейтинге его категории и в рейтинге каждого из его жанров.
+    """
+
+    scope = models.CharField(
+        choices=RANK_SCOPES, max_length=RANK_SCOPE_MAX_LENGTH
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='ranks'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+'
+    )
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+'
+    )
+    weighted_rating = models.FloatField('Взвешенный рейтинг')
+
+    class Meta:
+        """Метаданные рейтинга."""
+
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Рейтинг произведений'
+        # Каждый разрез читается одним диапазоном индекса по своему ключу.
+        indexes = [
+            models.Index(
+                fields=['scope', '-weighted_rating', 'title'],
+                name='title_rank_all_idx'
+            ),
+            models.Index(
+                fields=['scope', 'category', '-weighted_rating', 'title'],
+                name='title_rank_category_idx'
+            ),
+            models.Index(
+                fields=['scope', 'genre', '-weighted_rating', 'title'],
+                name='title_rank_genre_idx'
+            ),
+        ]
+
+    def __str__(self):
+        """Строковое представление класса."""
+        return f'{self.scope}: {self.title_id} ({self.weighted_rating})'
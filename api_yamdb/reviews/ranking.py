@@ -0,0 +1,130 @@
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Sum
+
+from .metrics import metrics
+from .models import Title, TitleRank
+
+MEAN_CACHE_KEY = 'reviews:top_titles:mean'
+
+
+def global_mean():
+    """Средняя оценка по всем отзывам сервиса."""
+    totals = Title.objects.aggregate(
+        score_sum=Sum('score_sum'), review_count=Sum('review_count')
+    )
+    if not totals['review_count']:
+        return 0.0
+    return totals['score_sum'] / totals['review_count']
+
+
+def mean_store():
+    return caches[settings.TOP_TITLES_MEAN_CACHE]
+
+
+def cached_global_mean():
+    """
+    Средняя оценка, рассчитанная при последнем полном обновлении, из
+    общего для процессов кеша: строки рейтинга, записанные разными
+    процессами, должны считаться с одним средним. Пропавшее значение
+    пересчитывает и добавляет первый процесс, остальные читают его.
+    """
+    store = mean_store()
+    mean = store.get(MEAN_CACHE_KEY)
+    if mean is not None:
+        metrics.incr('global_mean', 'hits')
+        return mean
+    metrics.incr('global_mean', 'misses')
+    started = perf_counter()
+    mean = global_mean()
+    metrics.timing(
+        'global_mean', 'compute_ms', '', (perf_counter() - started) * 1000
+    )
+    store.add(MEAN_CACHE_KEY, mean, None)
+    return store.get(MEAN_CACHE_KEY, mean)
+
+
+def weighted_rating(score_sum, review_count, mean, weight):
+    """Байесовская оценка: среднее, притянутое к общему среднему."""
+    return (score_sum + mean * weight) / (review_count + weight)
+
+
+def build_ranks(title_id, category_id, genre_ids, score_sum, review_count,
+                mean, weight):
+    """Строки рейтинга одного произведения во всех его разрезах."""
+    if not review_count:
+        return []
+    value = weighted_rating(score_sum, review_count, mean, weight)
+    ranks = [
+        TitleRank(scope='all', title_id=title_id, weighted_rating=value),
+        TitleRank(
+            scope='category', title_id=title_id, category_id=category_id,
+            weighted_rating=value
+        ),
+    ]
+    ranks.extend(
+        TitleRank(
+            scope='genre', title_id=title_id, genre_id=genre_id,
+            weighted_rating=value
+        )
+        for genre_id in genre_ids
+    )
+    return ranks
+
+
+def refresh_title_ranking(title_id):
+    """Пересчитывает место в рейтинге одного произведения."""
+    title = Title.objects.filter(pk=title_id).values(
+        'category_id', 'score_sum', 'review_count'
+    ).first()
+    with transaction.atomic():
+        TitleRank.objects.filter(title_id=title_id).delete()
+        if title is None or not title['review_count']:
+            return
+        genre_ids = Title.genre.through.objects.filter(
+            title_id=title_id
+        ).values_list('genre_id', flat=True)
+        TitleRank.objects.bulk_create(build_ranks(
+            title_id, genre_ids=genre_ids, mean=cached_global_mean(),
+            weight=settings.TOP_TITLES_MIN_REVIEWS, **title
+        ))
+
+
+def schedule_ranking_refresh(title_id):
+    """Пересчет рейтинга после фиксации транзакции с изменениями."""
+    transaction.on_commit(lambda: refresh_title_ranking(title_id))
+
+
+def rebuild_ranking(batch_size=1000):
+    """Полностью перестраивает рейтинг с актуальным общим средним."""
+    mean = global_mean()
+    weight = settings.TOP_TITLES_MIN_REVIEWS
+    genres = {}
+    for title_id, genre_id in Title.genre.through.objects.values_list(
+        'title_id', 'genre_id'
+    ).iterator():
+        genres.setdefault(title_id, []).append(genre_id)
+    titles = Title.objects.filter(review_count__gt=0).values_list(
+        'id', 'category_id', 'score_sum', 'review_count'
+    )
+    count = 0
+    with transaction.atomic():
+        TitleRank.objects.all().delete()
+        batch = []
+        for title_id, category_id, score_sum, review_count in (
+            titles.iterator()
+        ):
+            batch.extend(build_ranks(
+                title_id, category_id, genres.get(title_id, ()),
+                score_sum, review_count, mean, weight
+            ))
+            count += 1
+            if len(batch) >= batch_size:
+                TitleRank.objects.bulk_create(batch)
+                batch = []
+        TitleRank.objects.bulk_create(batch)
+    mean_store().set(MEAN_CACHE_KEY, mean, None)
+    return count, mean
@@ -0,0 +1,132 @@
+import math
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, FloatField, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import Review, ScoreCount, Title
+
+
+def rating_expression():
+    """Выражение для рейтинга из сохраненных счетчиков произведения."""
+    return Case(
+        When(review_count=0, then=None),
+        default=(
+            Cast('score_sum', FloatField())
+            / Cast('review_count', FloatField())
+        ),
+        output_field=FloatField()
+    )
+
+
+def bump_title_versions(title_ids):
+    """Отмечает произведения измененными для кешей их представления."""
+    Title.objects.filter(pk__in=title_ids).update(
+        version=F('version') + 1, updated_at=timezone.now()
+    )
+
+
+def change_score_count(title_id, score, delta):
+    """Изменяет счетчик отзывов с оценкой score, создавая его при нужде."""
+    counters = ScoreCount.objects.filter(title_id=title_id, score=score)
+    if counters.update(count=F('count') + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            ScoreCount.objects.create(
+                title_id=title_id, score=score, count=delta
+            )
+    except IntegrityError:
+        counters.update(count=F('count') + delta)
+
+
+def apply_review_delta(title_id, added=None, removed=None):
+    """
+    Атомарно изменяет счетчики оценок произведения:
+    added - оценка появившегося отзыва, removed - оценка ушедшего.
+    """
+    if added == removed:
+        return
+    score_delta = (added or 0) - (removed or 0)
+    count_delta = (added is not None) - (removed is not None)
+    with transaction.atomic():
+        titles = Title.objects.filter(pk=title_id)
+        titles.update(
+            score_sum=F('score_sum') + score_delta,
+            review_count=F('review_count') + count_delta,
+            version=F('version') + 1,
+            updated_at=timezone.now()
+        )
+        titles.update(rating=rating_expression())
+        if removed is not None:
+            change_score_count(title_id, removed, -1)
+        if added is not None:
+            change_score_count(title_id, added, 1)
+
+
+def histogram_value_at(histogram, index):
+    """Значение с порядковым номером index в отсортированных оценках."""
+    seen = 0
+    for score in sorted(histogram):
+        seen += histogram[score]
+        if seen > index:
+            return score
+    return None
+
+
+def histogram_quantile(histogram, fraction):
+    """
+    Квантиль по гистограмме {оценка: количество} методом ближайшего ранга.
+    Для пустой гистограммы возвращает None.
+    """
+    total = sum(histogram.values())
+    if not total:
+        return None
+    return histogram_value_at(
+        histogram, max(math.ceil(fraction * total), 1) - 1
+    )
+
+
+def histogram_median(histogram):
+    """Медиана по гистограмме {оценка: количество}."""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    return (
+        histogram_value_at(histogram, (total - 1) // 2)
+        + histogram_value_at(histogram, total // 2)
+    ) / 2
+
+
+def find_rating_drift():
+    """
+    Сравнивает сохраненные счетчики с полным пересчетом по отзывам.
+    Возвращает словарь {id произведения: (сохранено, пересчитано)},
+    где значения - (сумма оценок, количество отзывов, гистограмма).
+    """
+    actual = {}
+    for row in Review.objects.values('title', 'score').annotate(
+        total=Count('id')
+    ).order_by():
+        histogram = actual.setdefault(row['title'], {})
+        histogram[row['score']] = row['total']
+    stored = {}
+    for title_id, score, count in ScoreCount.objects.filter(
+        count__gt=0
+    ).values_list('title_id', 'score', 'count'):
+        stored.setdefault(title_id, {})[score] = count
+    drift = {}
+    for title_id, score_sum, review_count in Title.objects.values_list(
+        'id', 'score_sum', 'review_count'
+    ):
+        histogram = actual.get(title_id, {})
+        expected = (
+            sum(score * count for score, count in histogram.items()),
+            sum(histogram.values()),
+            histogram
+        )
+        current = (score_sum, review_count, stored.get(title_id, {}))
+        if current != expected:
+            drift[title_id] = (current, expected)
+    return drift
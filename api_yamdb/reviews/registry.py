@@ -0,0 +1,164 @@
+import threading
+from collections import namedtuple
+from time import perf_counter
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .metrics import metrics
+from .models import Category, Genre, Title
+
+CatalogRecord = namedtuple('CatalogRecord', ('id', 'name', 'slug'))
+# Сколько неизвестных ключей помнить до следующей смены версии.
+MISSES_MAX_SIZE = 1000
+
+
+class CatalogRegistry:
+    """
+    Справочник модели с полями name и slug в памяти процесса.
+    Актуальность сверяется с меткой версии в общем для всех процессов
+    кеше settings.CATALOG_VERSION_CACHE: любое изменение справочника
+    меняет метку, и каждый процесс перечитывает таблицу при следующей
+    проверке (refresh), обычно в начале запроса.
+    """
+
+    def __init__(self, model, basename):
+        self.model = model
+        self.basename = basename
+        self.version_key = f'catalog:{model._meta.label_lower}:version'
+        self._lock = threading.Lock()
+        self._version = None
+        self._by_id = {}
+        self._by_slug = {}
+        self._misses = set()
+
+    def __deepcopy__(self, memo):
+        # Поля сериализаторов копируются вместе с аргументами,
+        # а справочник должен оставаться общим для процесса.
+        return self
+
+    @property
+    def version(self):
+        """Метка версии, с которой загружен справочник."""
+        if self._version is None:
+            self.refresh()
+        return self._version
+
+    @property
+    def versions(self):
+        return caches[settings.CATALOG_VERSION_CACHE]
+
+    def current_version(self):
+        version = self.versions.get(self.version_key)
+        if version is None:
+            self.versions.add(self.version_key, uuid4().hex, None)
+            version = self.versions.get(self.version_key)
+        return version
+
+    def load(self, version):
+        """Перечитывает таблицу; версию нужно получить до чтения."""
+        started = perf_counter()
+        records = [
+            CatalogRecord(*row)
+            for row in self.model.objects.order_by('id').values_list(
+                'id', 'name', 'slug'
+            )
+        ]
+        with self._lock:
+            self._by_id = {record.id: record for record in records}
+            self._by_slug = {record.slug: record for record in records}
+            self._misses = set()
+            self._version = version
+        metrics.incr('catalog', 'reloads', self.basename)
+        metrics.timing(
+            'catalog', 'load_ms', self.basename,
+            (perf_counter() - started) * 1000
+        )
+
+    def refresh(self):
+        """Перечитывает справочник, если другой процесс его изменил."""
+        version = self.current_version()
+        if version != self._version:
+            self.load(version)
+
+    def _lookup(self, index_name, key):
+        if self._version is None:
+            self.refresh()
+        record = getattr(self, index_name).get(key)
+        if record is not None:
+            metrics.incr('catalog', 'hits', self.basename)
+            return record
+        metrics.incr('catalog', 'misses', self.basename)
+        if (index_name, key) in self._misses:
+            return None
+        # Промах мог случиться из-за еще не замеченного изменения,
+        # таблица перечитывается только при смене метки версии.
+        self.refresh()
+        record = getattr(self, index_name).get(key)
+        if record is None:
+            with self._lock:
+                if len(self._misses) >= MISSES_MAX_SIZE:
+                    self._misses = set()
+                self._misses.add((index_name, key))
+        return record
+
+    def by_id(self, pk):
+        return self._lookup('_by_id', pk)
+
+    def by_slug(self, slug):
+        return self._lookup('_by_slug', slug)
+
+    def all(self):
+        if self._version is None:
+            self.refresh()
+        return list(self._by_id.values())
+
+    def instance(self, record):
+        """Объект модели из записи справочника без запроса к базе."""
+        return self.model.from_db(
+            DEFAULT_DB_ALIAS, CatalogRecord._fields, record
+        )
+
+    def invalidate(self):
+        """Новая метка версии после фиксации изменений справочника."""
+        def bump():
+            self.versions.set(self.version_key, uuid4().hex, None)
+            self._version = None
+
+        transaction.on_commit(bump)
+
+
+categories = CatalogRegistry(Category, 'categories')
+genres = CatalogRegistry(Genre, 'genres')
+
+
+def refresh_catalog():
+    """Сверяет справочники жанров и категорий с общей меткой версии."""
+    categories.refresh()
+    genres.refresh()
+
+
+def attach_genre_ids(titles):
+    """Загружает id жанров для страницы произведений одним запросом."""
+    titles = [title for title in titles if title is not None]
+    genre_ids = {title.pk: [] for title in titles}
+    for title_id, genre_id in Title.genre.through.objects.filter(
+        title_id__in=genre_ids
+    ).order_by('genre_id').values_list('title_id', 'genre_id'):
+        genre_ids[title_id].append(genre_id)
+    for title in titles:
+        title._genre_ids = genre_ids[title.pk]
+    return titles
+
+
+def title_genre_ids(title):
+    """id жанров произведения, загруженные заранее или отдельным запросом."""
+    if not hasattr(title, '_genre_ids'):
+        title._genre_ids = list(
+            Title.genre.through.objects.filter(title_id=title.pk).order_by(
+                'genre_id'
+            ).values_list('genre_id', flat=True)
+        )
+    return title._genre_ids
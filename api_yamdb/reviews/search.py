@@ -0,0 +1,138 @@
+import re
+from functools import reduce
+from operator import and_, or_
+
+from django.db import DatabaseError, connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'reviews_title_fts'
+FTS_COLUMNS = ('name', 'description')
+TOKEN_PATTERN = re.compile(r'\w+')
+
+_available = {}
+
+
+def create_index(connection):
+    """
+    Создает полнотекстовый индекс FTS5, если база его поддерживает.
+    Возвращает True при успехе.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+                f'{", ".join(FTS_COLUMNS)}, '
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+    except DatabaseError:
+        return False
+    _available.pop(connection.alias, None)
+    return True
+
+
+def drop_index(connection):
+    """Удаляет полнотекстовый индекс."""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    _available.pop(connection.alias, None)
+
+
+def index_available(using='default'):
+    """Есть ли полнотекстовый индекс в базе; результат запоминается."""
+    if using not in _available:
+        connection = connections[using]
+        _available[using] = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _available[using]
+
+
+def rebuild_index(titles, using='default'):
+    """Полностью перестраивает индекс по выборке произведений."""
+    if not index_available(using):
+        return 0
+    rows = list(titles.values_list('id', *FTS_COLUMNS))
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, {", ".join(FTS_COLUMNS)}) '
+            'VALUES (%s, %s, %s)',
+            rows
+        )
+    return len(rows)
+
+
+def index_title(title, using='default'):
+    """Обновляет произведение в индексе после сохранения."""
+    if not index_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [title.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, {", ".join(FTS_COLUMNS)}) '
+            'VALUES (%s, %s, %s)',
+            [title.pk, title.name, title.description]
+        )
+
+
+def unindex_title(title_id, using='default'):
+    """Удаляет произведение из индекса."""
+    if not index_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [title_id])
+
+
+def match_expression(text, column=None):
+    """
+    Запрос FTS5 из пользовательского текста: каждое слово ищется
+    как префикс, все слова обязательны. Спецсимволы FTS5 отбрасываются.
+    """
+    tokens = TOKEN_PATTERN.findall(text)
+    if not tokens:
+        return None
+    expression = ' '.join(f'"{token}"*' for token in tokens)
+    if column:
+        return f'{column} : ({expression})'
+    return expression
+
+
+def search_titles(queryset, text, column=None, ranked=True):
+    """
+    Отбирает произведения по словам из text в названии и описании
+    (или только в column). С индексом FTS5 добавляет search_rank -
+    чем меньше, тем релевантнее; без индекса ищет подстроки.
+    """
+    using = queryset.db
+    columns = (column,) if column else FTS_COLUMNS
+    if not index_available(using):
+        tokens = TOKEN_PATTERN.findall(text) or [text]
+        return queryset.filter(reduce(and_, (
+            reduce(or_, (
+                Q(**{f'{name}__icontains': token}) for name in columns
+            ))
+            for token in tokens
+        )))
+    expression = match_expression(text, column)
+    if expression is None:
+        return queryset.none()
+    queryset = queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [expression]
+    ))
+    if not ranked:
+        return queryset
+    title_table = connections[using].ops.quote_name(
+        queryset.model._meta.db_table
+    )
+    return queryset.annotate(search_rank=RawSQL(
+        f'SELECT rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+        f'AND rowid = {title_table}.id',
+        [expression],
+        output_field=FloatField()
+    ))
@@ -0,0 +1,116 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from .models import Category, Genre, Review, Title
+from .ranking import schedule_ranking_refresh
+from .ratings import apply_review_delta, bump_title_versions
+from .registry import categories, genres
+from .search import index_title, unindex_title
+
+
+@receiver(pre_save, sender=Review)
+@receiver(pre_delete, sender=Review)
+def review_pre_save(sender, instance, raw=False, **kwargs):
+    """
+    Читает прежние оценку и произведение с блокировкой строки: значениям
+    в памяти верить нельзя, отзыв мог измениться параллельно.
+    """
+    if raw or instance._state.adding:
+        return
+    instance._loaded_score, instance._loaded_title_id = (
+        Review.objects.select_for_update().filter(
+            pk=instance.pk
+        ).values_list('score', 'title_id').first() or (None, None)
+    )
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    """Обновляет счетчики оценок произведения при создании/изменении."""
+    if raw:
+        return
+    loaded_title_id = getattr(instance, '_loaded_title_id', None)
+    loaded_score = getattr(instance, '_loaded_score', None)
+    if created or loaded_title_id is None:
+        apply_review_delta(instance.title_id, added=instance.score)
+    elif loaded_title_id != instance.title_id:
+        apply_review_delta(loaded_title_id, removed=loaded_score)
+        apply_review_delta(instance.title_id, added=instance.score)
+        schedule_ranking_refresh(loaded_title_id)
+    else:
+        apply_review_delta(
+            instance.title_id, added=instance.score, removed=loaded_score
+        )
+    schedule_ranking_refresh(instance.title_id)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Обновляет счетчики оценок произведения при удалении отзыва."""
+    # Прежние значения всегда подгружает pre_delete.
+    title_id = instance._loaded_title_id
+    apply_review_delta(title_id, removed=instance._loaded_score)
+    schedule_ranking_refresh(title_id)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, created, raw=False, using=None, **kwargs):
+    """Обновляет поисковый индекс и рейтинг категории произведения."""
+    if raw:
+        return
+    index_title(instance, using=using)
+    if not created:
+        bump_title_versions([instance.pk])
+        schedule_ranking_refresh(instance.pk)
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, using=None, **kwargs):
+    """Убирает произведение из поискового индекса."""
+    unindex_title(instance.pk, using=using)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """Обновляет жанровые рейтинги при изменении жанров произведения."""
+    if reverse and action == 'pre_clear':
+        # В post_clear pk_set пуст: произведения жанра запоминаются заранее.
+        instance._cleared_title_ids = list(
+            sender.objects.filter(genre_id=instance.pk).values_list(
+                'title_id', flat=True
+            )
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        bump_title_versions([instance.pk])
+        schedule_ranking_refresh(instance.pk)
+        return
+    title_ids = cleared_title_ids(instance, action, pk_set)
+    bump_title_versions(title_ids)
+    for title_id in title_ids:
+        schedule_ranking_refresh(title_id)
+
+
+def cleared_title_ids(genre, action, pk_set):
+    """Произведения, затронутые изменением связей со стороны жанра."""
+    if action == 'post_clear':
+        return getattr(genre, '_cleared_title_ids', ())
+    return pk_set or ()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    """Сбрасывает справочник категорий во всех процессах."""
+    categories.invalidate()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def genre_changed(sender, **kwargs):
+    """Сбрасывает справочник жанров во всех процессах."""
+    genres.invalidate()
@@ -1,6 +1,9 @@
 import os
+import shutil
 import sys
+import tempfile
 
+import pytest
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +36,36 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+def pytest_configure(config):
+    """Файловые кеши тестов во временном каталоге, а не в BASE_DIR/cache."""
+    from django.conf import settings
+
+    config.cache_dir = tempfile.mkdtemp(prefix='api_yamdb-cache-')
+    settings.CACHES = {
+        alias: (
+            {**options, 'LOCATION': os.path.join(config.cache_dir, alias)}
+            if 'LOCATION' in options else options
+        )
+        for alias, options in settings.CACHES.items()
+    }
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(config.cache_dir, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def clear_shared_caches():
+    """Очистка базы между тестами не вызывает сигналы сброса кешей."""
+    from django.core.cache import caches
+
+    from api.cache import missing_reviews, missing_titles
+    from reviews.metrics import metrics
+
+    caches['responses'].clear()
+    caches['users'].clear()
+    missing_titles.clear()
+    missing_reviews.clear()
+    metrics.clear()
@@ -0,0 +1,323 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def check_counters(self):
+        from reviews.ratings import find_rating_drift
+
+        drift = find_rating_drift()
+        assert not drift, (
+            'Проверьте, что сохраненные `score_sum` и `review_count` '
+            'произведений совпадают с полным пересчетом по отзывам. '
+            f'Расхождения: {drift}'
+        )
+
+    def test_01_counters_follow_review_writes(self, admin_client, admin,
+                                              user, user_client, moderator,
+                                              moderator_client):
+        from reviews.models import Title
+
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        self.check_counters()
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.review_count, title.rating) == (
+            15, 3, 5
+        ), 'Проверьте, что счетчики обновляются при создании отзыва.'
+
+        response = user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[1]['id']
+            ),
+            data={'score': 8}
+        )
+        assert response.status_code == HTTPStatus.OK
+        self.check_counters()
+        title.refresh_from_db()
+        assert title.rating == 6, (
+            'Проверьте, что рейтинг пересчитывается при изменении оценки.'
+        )
+
+        response = moderator_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[0]['id']
+            )
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        self.check_counters()
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (13, 2)
+
+    def test_02_counters_follow_cascade_delete(self, admin_client, admin,
+                                               user, user_client):
+        from reviews.models import Title
+
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        user.delete()
+        self.check_counters()
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.review_count, title.rating) == (1, 5)
+
+        admin.delete()
+        self.check_counters()
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count, title.rating) == (
+            0, 0, None
+        ), 'Без отзывов рейтинг произведения должен быть `None`.'
+
+    def test_03_order_and_filter_by_rating(self, admin_client, admin, user,
+                                           user_client):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        response = admin_client.get('/api/v1/titles/?ordering=-rating')
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        assert results[0]['id'] == titles[0]['id'], (
+            'Проверьте, что `/api/v1/titles/` поддерживает сортировку '
+            '`?ordering=-rating`.'
+        )
+        response = admin_client.get(
+            '/api/v1/titles/?ordering=-review_count&reviews_min=1'
+        )
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[0]['id']
+        ], 'Проверьте фильтр `reviews_min` по количеству отзывов.'
+        for query, expected in (('rating_min=5', 1), ('rating_max=4', 0)):
+            response = admin_client.get(f'/api/v1/titles/?{query}')
+            assert response.json()['count'] == expected, (
+                f'Проверьте фильтр `{query}` по рейтингу произведения.'
+            )
+
+    def test_04_score_histogram(self, client, admin_client, admin, user,
+                                user_client, moderator, moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[1]['id']
+            ),
+            data={'score': 8}
+        )
+        self.check_counters()
+        url = f'/api/v1/titles/{titles[0]["id"]}/scores/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` доступен без токена.'
+        )
+        data = response.json()
+        expected_histogram = {str(score): 0 for score in range(1, 11)}
+        expected_histogram.update({'5': 2, '8': 1})
+        assert data['histogram'] == expected_histogram, (
+            'Проверьте, что гистограмма содержит количество отзывов для '
+            'каждой оценки от 1 до 10.'
+        )
+        assert data['median'] == 5
+        assert data['percentiles'] == {'10': 5, '25': 5, '75': 8, '90': 8}
+
+        response = client.get(f'/api/v1/titles/{titles[1]["id"]}/scores/')
+        data = response.json()
+        assert (data['review_count'], data['median']) == (0, None)
+        response = client.get('/api/v1/titles/0/scores/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_05_recompute_ratings_command(self, admin_client, admin, user,
+                                          user_client):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        from reviews.models import ScoreCount, Title
+        from reviews.ratings import find_rating_drift
+
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        Title.objects.filter(pk=titles[0]['id']).update(
+            score_sum=1, review_count=7
+        )
+        ScoreCount.objects.filter(title_id=titles[0]['id']).delete()
+        ScoreCount.objects.create(title_id=titles[1]['id'], score=3, count=2)
+
+        out = StringIO()
+        call_command('recompute_ratings', '--chunk-size=1', stdout=out)
+        assert 'с расхождениями: 2' in out.getvalue(), (
+            'Проверьте, что `recompute_ratings` сообщает о расхождениях.'
+        )
+        assert len(find_rating_drift()) == 2, (
+            'Без `--fix` команда не должна изменять данные.'
+        )
+
+        call_command('recompute_ratings', '--fix', stdout=StringIO())
+        self.check_counters()
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert title.rating == 5
+
+    def test_06_stale_title_save_keeps_counters(self, admin_client, admin,
+                                                user, user_client):
+        from reviews.models import Review, Title
+
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        title = Title.objects.get(pk=titles[0]['id'])
+        user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/',
+            data={'text': 'Отзыв', 'score': 9}
+        )
+        title.name = 'Новое название'
+        title.save()
+        self.check_counters()
+        title.refresh_from_db()
+        assert (title.name, title.review_count) == ('Новое название', 2), (
+            'Проверьте, что сохранение произведения не перезаписывает '
+            'счетчики рейтинга устаревшими значениями.'
+        )
+
+        review = Review.objects.only('id', 'text').get(pk=reviews[0]['id'])
+        review.text = 'Другой текст'
+        review.save()
+        self.check_counters()
+        Review.objects.only('id').get(pk=reviews[0]['id']).delete()
+        self.check_counters()
+
+    def test_07_recompute_ignores_new_titles(self, admin_client, admin,
+                                             user, user_client, monkeypatch):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        from reviews.management.commands import recompute_ratings
+        from reviews.models import Review, Title
+
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        iterate_chunks = recompute_ratings.iterate_chunks
+
+        def create_title_first(queryset, fields, chunk_size):
+            # Произведение с отзывом появляется после начала пересчета.
+            if not Title.objects.filter(name='Новое').exists():
+                title = Title.objects.create(
+                    name='Новое', year=2000,
+                    category_id=Title.objects.get(
+                        pk=titles[0]['id']
+                    ).category_id
+                )
+                Review.objects.create(
+                    title=title, author=admin, text='Отзыв', score=7
+                )
+            return iterate_chunks(queryset, fields, chunk_size)
+
+        monkeypatch.setattr(
+            recompute_ratings, 'iterate_chunks', create_title_first
+        )
+        out = StringIO()
+        call_command('recompute_ratings', stdout=out)
+        assert 'с расхождениями: 0' in out.getvalue(), (
+            'Проверьте, что `recompute_ratings` не падает и не сообщает '
+            'о расхождениях из-за произведений, созданных во время '
+            'пересчета.'
+        )
+
+    def test_08_rating_totals_histogram(self):
+        import numpy as np
+
+        from reviews.management.commands.recompute_ratings import (
+            RatingTotals
+        )
+
+        totals = RatingTotals(3)
+        skipped = totals.add_reviews(
+            np.array([1, 1, 2, 1, 2]), np.array([5, 5, 10, 0, 1])
+        )
+        assert skipped == 1
+        assert totals.histogram_of(1) == {5: 2}, (
+            'Проверьте, что повторяющиеся пары (произведение, оценка) в '
+            'одной пачке учитываются в гистограмме все.'
+        )
+        assert totals.histogram_of(2) == {1: 1, 10: 1}
+
+    def test_09_recompute_fix_refreshes_api(self, client, admin_client,
+                                            admin):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        from reviews.models import Review, Title
+
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        title_id = titles[0]['id']
+        detail_url = f'/api/v1/titles/{title_id}/'
+        list_url = '/api/v1/titles/'
+        etag = client.get(detail_url)['ETag']
+        client.get(list_url)
+        Review.objects.filter(title_id=title_id).update(score=10)
+
+        call_command('recompute_ratings', '--fix', stdout=StringIO())
+        assert Title.objects.get(pk=title_id).rating == 10
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после `recompute_ratings --fix` ETag '
+            'произведения меняется.'
+        )
+        assert response.json()['rating'] == 10, (
+            'Проверьте, что после `recompute_ratings --fix` страница '
+            'произведения показывает исправленный рейтинг.'
+        )
+        ratings = {
+            title['id']: title['rating']
+            for title in client.get(list_url).json()['results']
+        }
+        assert ratings[title_id] == 10, (
+            'Проверьте, что после `recompute_ratings --fix` список '
+            'произведений показывает исправленный рейтинг.'
+        )
+
+    def test_10_review_writes_are_atomic(self, admin_client, admin,
+                                         monkeypatch):
+        from reviews import signals
+        from reviews.models import Review
+
+        reviews, _ = create_reviews(admin_client, {admin: admin_client})
+        first = Review.objects.get(pk=reviews[0]['id'])
+        second = Review.objects.get(pk=reviews[0]['id'])
+        first.score, second.score = 7, 9
+        first.save()
+        second.save()
+        self.check_counters()
+
+        def fail(*args, **kwargs):
+            raise RuntimeError
+
+        monkeypatch.setattr(signals, 'apply_review_delta', fail)
+        second.score = 1
+        with pytest.raises(RuntimeError):
+            second.save()
+        assert Review.objects.get(pk=second.pk).score == 9, (
+            'Проверьте, что отзыв и счетчики оценок произведения '
+            'записываются одной транзакцией.'
+        )
+        with pytest.raises(RuntimeError):
+            second.delete()
+        assert Review.objects.filter(pk=second.pk).exists()
+        monkeypatch.undo()
+        self.check_counters()
@@ -0,0 +1,73 @@
+import pytest
+from django.core.cache import caches
+from rest_framework.pagination import PageNumberPagination
+
+
+@pytest.fixture
+def titles_factory():
+    from reviews.models import Category, Genre, Title
+
+    def create(count):
+        category = Category.objects.create(name='Фильм', slug='films')
+        genres = [
+            Genre.objects.create(name='Драма', slug='drama'),
+            Genre.objects.create(name='Комедия', slug='comedy'),
+        ]
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {idx}', year=2000, category=category)
+            for idx in range(count)
+        )
+        titles = list(Title.objects.all())
+        for title in titles:
+            title.genre.set(genres)
+        return titles
+
+    return create
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleQueries:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    @pytest.mark.parametrize('count', (1, 5, 100))
+    def test_01_title_list_queries(self, client, monkeypatch,
+                                   django_assert_num_queries,
+                                   titles_factory, count):
+        titles_factory(count)
+        monkeypatch.setattr(PageNumberPagination, 'page_size', count)
+        # Первый запрос загружает справочники жанров и категорий.
+        client.get(self.TITLES_URL)
+        caches['default'].clear()
+        caches['responses'].clear()
+        # Валидаторы ETag (их COUNT использует и пагинация), страница
+        # произведений, жанры страницы.
+        with django_assert_num_queries(3):
+            response = client.get(self.TITLES_URL)
+        assert len(response.json()['results']) == count, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` возвращает '
+            'всю страницу произведений.'
+        )
+        # Из кеша представлений жанры уже не нужны.
+        caches['responses'].clear()
+        with django_assert_num_queries(2):
+            cached = client.get(self.TITLES_URL)
+        assert cached.json() == response.json()
+        # Готовый ответ анонимному пользователю - без запросов к базе.
+        with django_assert_num_queries(0):
+            cached = client.get(self.TITLES_URL)
+        assert cached.json() == response.json()
+
+    def test_02_title_detail_queries(self, client, django_assert_num_queries,
+                                     titles_factory):
+        title = titles_factory(1)[0]
+        client.get(self.TITLES_URL)
+        caches['default'].clear()
+        with django_assert_num_queries(2):
+            response = client.get(
+                self.TITLES_DETAIL_URL_TEMPLATE.format(
+                    title_id=title.id
+                )
+            )
+        assert len(response.json()['genre']) == 2
@@ -0,0 +1,148 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10TopTitles:
+
+    TOP_URL = '/api/v1/titles/top/'
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self, settings):
+        from reviews.ranking import MEAN_CACHE_KEY, mean_store
+
+        settings.TOP_TITLES_MIN_REVIEWS = 2
+        cache.clear()
+        mean_store().delete(MEAN_CACHE_KEY)
+        yield
+        cache.clear()
+        mean_store().delete(MEAN_CACHE_KEY)
+
+    def test_01_top_is_weighted(self, admin_client, user_client,
+                                moderator_client):
+        titles, categories, genres = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'Хорошо', 9)
+        create_single_review(user_client, titles[0]['id'], 'Хорошо', 9)
+        create_single_review(moderator_client, titles[0]['id'], 'Хорошо', 9)
+        create_single_review(admin_client, titles[1]['id'], 'Шедевр', 10)
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Скучный фильм',
+            'year': 2000,
+            'genre': [genres[2]['slug']],
+            'category': categories[0]['slug']
+        })
+        boring_id = response.json()['id']
+        for client in (admin_client, user_client, moderator_client):
+            create_single_review(client, boring_id, 'Скучно', 2)
+        call_command('refresh_top_titles')
+
+        response = admin_client.get(self.TOP_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{self.TOP_URL}` не найден или недоступен.'
+        )
+        results = response.json()['results']
+        assert [title['id'] for title in results] == [
+            titles[0]['id'], titles[1]['id'], boring_id
+        ], (
+            'Проверьте, что одна оценка 10 не поднимает произведение выше '
+            'произведения с несколькими оценками 9.'
+        )
+        assert results[0]['weighted_rating'] == pytest.approx(
+            (27 + 43 / 7 * 2) / 5
+        )
+
+        response = admin_client.get(
+            f'{self.TOP_URL}?genre={genres[2]["slug"]}'
+        )
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[1]['id'], boring_id
+        ], f'Проверьте фильтр по жанру для `{self.TOP_URL}`.'
+        response = admin_client.get(
+            f'{self.TOP_URL}?category={categories[0]["slug"]}'
+            f'&genre={genres[2]["slug"]}'
+        )
+        assert [title['id'] for title in response.json()['results']] == [
+            boring_id
+        ], f'Проверьте фильтр по категории и жанру для `{self.TOP_URL}`.'
+
+    def test_02_top_follows_review_writes(self, admin_client, user_client):
+        titles, categories, _ = create_titles(admin_client)
+        response = admin_client.get(self.TOP_URL)
+        assert response.json()['count'] == 0, (
+            'Произведения без отзывов не должны попадать в рейтинг.'
+        )
+        review = create_single_review(
+            user_client, titles[1]['id'], 'Хорошо', 8
+        ).json()
+        response = admin_client.get(
+            f'{self.TOP_URL}?category={categories[1]["slug"]}'
+        )
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[1]['id']
+        ], 'Проверьте, что рейтинг обновляется при создании отзыва.'
+
+        user_client.delete(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{review["id"]}/'
+        )
+        response = admin_client.get(self.TOP_URL)
+        assert response.json()['count'] == 0, (
+            'Проверьте, что рейтинг обновляется при удалении отзыва.'
+        )
+
+    def test_03_reverse_genre_clear(self, admin_client, user_client):
+        from reviews.models import Genre
+
+        titles, _, genres = create_titles(admin_client)
+        create_single_review(user_client, titles[1]['id'], 'Хорошо', 8)
+        url = f'{self.TOP_URL}?genre={genres[2]["slug"]}'
+        assert admin_client.get(url).json()['count'] == 1
+        Genre.objects.get(slug=genres[2]['slug']).title_set.clear()
+        assert admin_client.get(url).json()['count'] == 0, (
+            'Проверьте, что рейтинг жанра обновляется, когда у жанра '
+            'удаляют все произведения.'
+        )
+
+    @pytest.mark.parametrize('filters, index', (
+        ({'scope': 'all'}, 'title_rank_all_idx'),
+        ({'scope': 'category', 'category_id': 1}, 'title_rank_category_idx'),
+        ({'scope': 'genre', 'genre_id': 1}, 'title_rank_genre_idx'),
+    ))
+    def test_04_scope_index(self, filters, index):
+        from reviews.models import TitleRank
+
+        ranks = TitleRank.objects.filter(**filters).order_by(
+            '-weighted_rating', 'title'
+        )
+        sql, params = ranks[:5].query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        assert index in plan and 'TEMP B-TREE' not in plan, (
+            f'Проверьте, что рейтинг в разрезе `{filters["scope"]}` '
+            f'читается по индексу `{index}` без сортировки: {plan}'
+        )
+
+    def test_05_shared_mean(self, admin_client, user_client):
+        from reviews.models import TitleRank
+        from reviews.ranking import (MEAN_CACHE_KEY, mean_store,
+                                     rebuild_ranking)
+
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Хорошо', 8)
+        _, mean = rebuild_ranking()
+        # Другой процесс: своего кеша default у него нет.
+        cache.clear()
+        mean_store().set(MEAN_CACHE_KEY, 2.0, None)
+        create_single_review(admin_client, titles[1]['id'], 'Хорошо', 8)
+        rank = TitleRank.objects.get(scope='all', title_id=titles[1]['id'])
+        assert rank.weighted_rating == (8 + 2.0 * 2) / (1 + 2), (
+            'Проверьте, что рейтинг произведения считается с общим '
+            'средним из общего для процессов кеша.'
+        )
+        assert mean == 8
@@ -0,0 +1,186 @@
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleFilters:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def get_ids(self, client, query):
+        response = client.get(f'{self.TITLES_URL}?{query}')
+        data = response.json()
+        ids = [title['id'] for title in data['results']]
+        assert len(ids) == len(set(ids)) == data['count'], (
+            f'Проверьте, что фильтр `{query}` не возвращает дубли '
+            'произведений.'
+        )
+        return sorted(ids)
+
+    def test_01_exact_and_multi_value_slugs(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        terminator, die_hard = titles[0]['id'], titles[1]['id']
+
+        assert self.get_ids(admin_client, 'genre=horro') == [], (
+            'Проверьте, что фильтр `genre` сравнивает slug точно.'
+        )
+        assert self.get_ids(admin_client, 'genre=horror') == [terminator]
+        assert self.get_ids(
+            admin_client, 'genre=horror,comedy,drama'
+        ) == [terminator, die_hard], (
+            'Проверьте, что `genre` со списком slug через запятую '
+            'возвращает произведения хотя бы с одним из жанров.'
+        )
+        assert self.get_ids(
+            admin_client, 'genre=horror,comedy&genre_mode=all'
+        ) == [terminator], (
+            'Проверьте, что `genre_mode=all` требует все перечисленные жанры.'
+        )
+        assert self.get_ids(
+            admin_client, 'genre=horror,drama&genre_mode=all'
+        ) == []
+        assert self.get_ids(
+            admin_client, 'category=films,books'
+        ) == [terminator, die_hard]
+        assert self.get_ids(
+            admin_client, 'category=fil&slug_match=contains'
+        ) == [terminator], (
+            'Проверьте, что `slug_match=contains` включает поиск по '
+            'подстроке slug.'
+        )
+        assert self.get_ids(
+            admin_client, 'genre=or&slug_match=contains'
+        ) == [terminator]
+
+    def test_02_facets(self, admin_client, django_assert_max_num_queries):
+        create_titles(admin_client)
+        response = admin_client.get(
+            f'{self.TITLES_URL}?category=films,books'
+        )
+        assert 'facets' not in response.json(), (
+            'Фасеты должны возвращаться только по запросу `?facets=`.'
+        )
+        with django_assert_max_num_queries(7):
+            response = admin_client.get(
+                f'{self.TITLES_URL}?genre=horror,drama'
+                '&facets=genre,category,year'
+            )
+        facets = response.json()['facets']
+        assert facets['genre'] == [
+            {'slug': 'comedy', 'name': 'Комедия', 'count': 1},
+            {'slug': 'drama', 'name': 'Драма', 'count': 1},
+            {'slug': 'horror', 'name': 'Ужасы', 'count': 1},
+        ], 'Проверьте подсчет произведений по жанрам в `facets`.'
+        assert facets['category'] == [
+            {'slug': 'books', 'name': 'Книги', 'count': 1},
+            {'slug': 'films', 'name': 'Фильм', 'count': 1},
+        ]
+        assert facets['year'] == [{'decade': 1980, 'count': 2}]
+
+        response = admin_client.get(
+            f'{self.TITLES_URL}?category=books&facets=category'
+        )
+        assert response.json()['facets'] == {'category': [
+            {'slug': 'books', 'name': 'Книги', 'count': 1}
+        ]}, 'Фасеты должны учитывать текущие фильтры.'
+        response = admin_client.get(f'{self.TITLES_URL}?facets=author')
+        assert response.status_code == 400
+
+    def test_03_year_range(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        terminator, die_hard = titles[0]['id'], titles[1]['id']
+        assert self.get_ids(admin_client, 'decade=1980') == [
+            terminator, die_hard
+        ], 'Проверьте фильтр `decade` по десятилетию.'
+        assert self.get_ids(admin_client, 'decade=1990') == []
+        assert self.get_ids(admin_client, 'year_min=1985') == [die_hard], (
+            'Проверьте фильтр `year_min`.'
+        )
+        assert self.get_ids(
+            admin_client, 'year_min=1980&year_max=1984'
+        ) == [terminator], 'Проверьте фильтр `year_max`.'
+
+    def test_04_full_text_search(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        terminator, die_hard = titles[0]['id'], titles[1]['id']
+
+        assert self.get_ids(admin_client, 'search=терминатор') == [
+            terminator
+        ], (
+            'Проверьте, что `?search=` не зависит от регистра кириллицы.'
+        )
+        assert self.get_ids(admin_client, 'search=yippie') == [die_hard], (
+            'Проверьте, что `?search=` ищет и по описанию произведения.'
+        )
+        assert self.get_ids(admin_client, 'search=креп ореш') == [die_hard]
+        assert self.get_ids(admin_client, 'search=") OR *') == []
+        assert self.get_ids(admin_client, 'name=крепкий') == [die_hard]
+
+        admin_client.patch(
+            f'{self.TITLES_URL}{die_hard}/', data={'name': 'Бегущий человек'}
+        )
+        assert self.get_ids(admin_client, 'search=орешек') == [], (
+            'Проверьте, что индекс обновляется при изменении произведения.'
+        )
+        assert self.get_ids(admin_client, 'search=бегущий') == [die_hard]
+        response = admin_client.get(
+            f'{self.TITLES_URL}?search=бегущий&facets=category,genre'
+        )
+        assert response.json()['facets']['category'][0]['count'] == 1
+
+        admin_client.delete(f'{self.TITLES_URL}{die_hard}/')
+        assert self.get_ids(admin_client, 'search=бегущий') == []
+
+    def test_05_search_ranking(self, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        ids = []
+        for name, description in (
+            ('Другое', 'Немного про бег'),
+            ('Бег', 'Бег, бег и еще раз бег'),
+        ):
+            response = admin_client.post(self.TITLES_URL, data={
+                'name': name,
+                'year': 2000,
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+                'description': description
+            })
+            ids.append(response.json()['id'])
+        response = admin_client.get(f'{self.TITLES_URL}?search=бег')
+        assert [title['id'] for title in response.json()['results']] == [
+            ids[1], ids[0]
+        ], 'Проверьте, что `?search=` сортирует по релевантности.'
+
+    def test_06_search_without_fts(self, admin_client, monkeypatch):
+        from reviews import search
+
+        titles, _, _ = create_titles(admin_client)
+        monkeypatch.setattr(search, '_available', {'default': False})
+        assert self.get_ids(admin_client, 'search=Yippie') == [
+            titles[1]['id']
+        ], 'Без FTS5 `?search=` должен искать по подстроке.'
+
+    def test_07_all_genres_by_substring(self, admin_client):
+        from reviews.models import Category, Genre, Title
+
+        genres = [
+            Genre.objects.create(name=slug, slug=slug)
+            for slug in ('drama', 'comedy', 'dramedy')
+        ]
+        category = Category.objects.create(name='Фильм', slug='film')
+        title = Title.objects.create(
+            name='Трагикомедия', year=2000, category=category
+        )
+        title.genre.set(genres)
+        drama = Title.objects.create(
+            name='Драма', year=2000, category=category
+        )
+        drama.genre.set(genres[::2])
+        assert self.get_ids(
+            admin_client, 'genre=dram,comed&genre_mode=all&slug_match=contains'
+        ) == [title.pk], (
+            'Проверьте, что `genre_mode=all` со `slug_match=contains` '
+            'требует совпадения с каждой подстрокой, даже если подстроке '
+            'подходят несколько жанров.'
+        )
@@ -0,0 +1,95 @@
+import pytest
+
+from tests.utils import create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12CatalogRegistry:
+
+    GENRES_URL = '/api/v1/genres/'
+
+    def test_01_other_process_sees_changes(self, admin_client):
+        from reviews.models import Genre
+        from reviews.registry import CatalogRegistry, genres
+
+        create_genre(admin_client)
+        # Отдельный экземпляр справочника ведет себя как другой процесс:
+        # общая у них только метка версии в кеше.
+        other_worker = CatalogRegistry(Genre, 'genres')
+        other_worker.refresh()
+        assert other_worker.by_slug('drama').name == 'Драма'
+
+        admin_client.post(
+            self.GENRES_URL, data={'name': 'Вестерн', 'slug': 'western'}
+        )
+        admin_client.delete(f'{self.GENRES_URL}drama/')
+        other_worker.refresh()
+        assert 'western' in {record.slug for record in other_worker.all()}
+        assert other_worker.by_slug('drama') is None, (
+            'Проверьте, что удаление жанра сбрасывает справочник во всех '
+            'процессах.'
+        )
+        assert genres.by_slug('drama') is None
+
+    def test_02_title_write_uses_registry(self, admin_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        genres = create_genre(admin_client)
+        admin_client.post(
+            '/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'}
+        )
+        admin_client.get('/api/v1/titles/')
+        data = {
+            'name': 'Поезд',
+            'year': 1985,
+            'genre': [genres[0]['slug'], genres[2]['slug']],
+            'category': 'films',
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 201, response.json()
+        catalog_queries = [
+            query['sql'] for query in context.captured_queries
+            if '"reviews_category"."slug"' in query['sql']
+            or '"reviews_genre"."slug"' in query['sql']
+        ]
+        assert not catalog_queries, (
+            'Проверьте, что slug жанров и категорий проверяются по '
+            'справочнику в памяти, без запросов к базе.'
+        )
+        assert response.json()['genre'] == [
+            {'name': 'Ужасы', 'slug': 'horror'},
+            {'name': 'Драма', 'slug': 'drama'},
+        ]
+        assert response.json()['category'] == {
+            'name': 'Фильм', 'slug': 'films'
+        }
+        data['genre'] = ['unknown']
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 400
+
+    def test_03_misses_do_not_reload(self, admin_client,
+                                     django_assert_num_queries):
+        from reviews.models import Genre
+        from reviews.registry import CatalogRegistry
+
+        create_genre(admin_client)
+        other_worker = CatalogRegistry(Genre, 'genres')
+        other_worker.refresh()
+        with django_assert_num_queries(0):
+            for _ in range(3):
+                assert other_worker.by_slug('unknown') is None
+        assert other_worker.by_id(0) is None
+        assert other_worker.by_slug('drama').name == 'Драма', (
+            'Проверьте, что промахи справочника не перечитывают таблицу, '
+            'пока метка версии не изменилась.'
+        )
+        admin_client.post(
+            self.GENRES_URL, data={'name': 'Неизвестный', 'slug': 'unknown'}
+        )
+        other_worker.refresh()
+        assert other_worker.by_slug('unknown').name == 'Неизвестный', (
+            'Проверьте, что запомненные промахи сбрасываются при смене '
+            'метки версии.'
+        )
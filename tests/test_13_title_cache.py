@@ -0,0 +1,66 @@
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13TitleRepresentationCache:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def get_title(self, client, title_id):
+        for title in client.get(self.TITLES_URL).json()['results']:
+            if title['id'] == title_id:
+                detail = client.get(f'{self.TITLES_URL}{title_id}/').json()
+                assert detail == title, (
+                    'Проверьте, что список и страница произведения '
+                    'возвращают одинаковое представление.'
+                )
+                return title
+
+    def test_01_cached_titles_are_invalidated(self, admin_client,
+                                              user_client):
+        titles, _, genres = create_titles(admin_client)
+        title_id = titles[0]['id']
+        assert self.get_title(admin_client, title_id)['rating'] is None
+
+        create_single_review(user_client, title_id, 'Отлично', 9)
+        assert self.get_title(admin_client, title_id)['rating'] == 9, (
+            'Проверьте, что новый отзыв сбрасывает кеш произведения.'
+        )
+
+        admin_client.patch(
+            f'{self.TITLES_URL}{title_id}/',
+            data={'name': 'Терминатор 2', 'genre': [genres[2]['slug']]}
+        )
+        title = self.get_title(admin_client, title_id)
+        assert title['name'] == 'Терминатор 2', (
+            'Проверьте, что изменение произведения сбрасывает его кеш.'
+        )
+        assert title['genre'] == [genres[2]], (
+            'Проверьте, что изменение жанров сбрасывает кеш произведения.'
+        )
+
+        admin_client.delete(f'/api/v1/genres/{genres[2]["slug"]}/')
+        assert self.get_title(admin_client, title_id)['genre'] == [], (
+            'Проверьте, что удаление жанра сбрасывает кеш произведений.'
+        )
+
+    def test_02_stale_save_keeps_version(self, admin_client, user_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        stale = Title.objects.get(pk=title_id)
+        create_single_review(user_client, title_id, 'Отлично', 9)
+        assert self.get_title(admin_client, title_id)['rating'] == 9
+        version = Title.objects.get(pk=title_id).version
+        stale.name = 'Терминатор 2'
+        stale.save()
+        assert Title.objects.get(pk=title_id).version > version, (
+            'Проверьте, что сохранение произведения не записывает '
+            'устаревшую версию из памяти.'
+        )
+        assert self.get_title(admin_client, title_id)['name'] == (
+            'Терминатор 2'
+        ), 'Проверьте, что сохранение произведения сбрасывает его кеш.'
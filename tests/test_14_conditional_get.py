@@ -0,0 +1,105 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14ConditionalGet:
+
+    def check_not_modified(self, client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.has_header('ETag'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит ETag.'
+        )
+        assert response.has_header('Last-Modified')
+        cached = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert cached.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным ETag '
+            'возвращает ответ со статусом 304.'
+        )
+        assert not cached.content
+        cached = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert cached.status_code == HTTPStatus.NOT_MODIFIED
+        return response['ETag']
+
+    def test_01_router_endpoints(self, client, admin_client, admin, user,
+                                 user_client):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id = titles[0]['id']
+        review_url = f'/api/v1/titles/{title_id}/reviews/'
+        user_client.post(
+            f'{review_url}{reviews[0]["id"]}/comments/', data={'text': 'Да'}
+        )
+        for url in (
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title_id}/',
+            review_url,
+            f'{review_url}{reviews[0]["id"]}/',
+            f'{review_url}{reviews[0]["id"]}/comments/',
+        ):
+            self.check_not_modified(client, url)
+        self.check_not_modified(admin_client, '/api/v1/users/')
+
+    def test_02_changes_invalidate_etag(self, client, admin_client, admin,
+                                        user, user_client):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        review_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        reviews_etag = self.check_not_modified(client, review_url)
+        title_etag = self.check_not_modified(client, title_url)
+
+        user_client.patch(
+            f'{review_url}{reviews[1]["id"]}/', data={'score': 1}
+        )
+        for url, etag in ((review_url, reviews_etag), (title_url, title_etag)):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что изменение отзыва меняет ETag `{url}`.'
+            )
+        reviews_etag = client.get(review_url)['ETag']
+        admin_client.delete(f'{review_url}{reviews[0]["id"]}/')
+        response = client.get(review_url, HTTP_IF_NONE_MATCH=reviews_etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что удаление отзыва меняет ETag списка отзывов.'
+        )
+        response = client.get(
+            f'{review_url}?page=2', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        assert response.status_code != HTTPStatus.NOT_MODIFIED, (
+            'ETag должен зависеть от параметров запроса.'
+        )
+
+    def test_03_author_rename_invalidates_etag(self, admin_client, admin,
+                                               user, user_client):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        review_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        user_client.post(
+            f'{review_url}{reviews[0]["id"]}/comments/', data={'text': 'Да'}
+        )
+        urls = (
+            review_url,
+            f'{review_url}{reviews[1]["id"]}/',
+            f'{review_url}{reviews[0]["id"]}/comments/',
+        )
+        etags = [self.check_not_modified(admin_client, url) for url in urls]
+        user.username = 'renamed'
+        user.save()
+        for url, etag in zip(urls, etags):
+            response = admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что переименование автора меняет ETag `{url}`.'
+            )
+            assert 'renamed' in response.content.decode()
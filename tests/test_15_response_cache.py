@@ -0,0 +1,95 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_reviews, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15ResponseCache:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def test_01_review_purges_only_its_title(self, client, admin_client,
+                                             admin, user_client,
+                                             django_assert_num_queries):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        first, second = (
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title['id'])
+            for title in titles[:2]
+        )
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        for url in (first, second, title_url, '/api/v1/titles/'):
+            client.get(url)
+            with django_assert_num_queries(0):
+                client.get(url)
+
+        create_single_review(user_client, titles[0]['id'], 'Хорошо', 1)
+        with django_assert_num_queries(0):
+            client.get(second)
+        assert client.get(first).json()['count'] == 2, (
+            'Проверьте, что новый отзыв сбрасывает кеш списка отзывов '
+            'произведения.'
+        )
+        assert client.get(title_url).json()['rating'] == 3, (
+            'Проверьте, что новый отзыв сбрасывает кеш страницы '
+            'произведения.'
+        )
+        ratings = {
+            title['id']: title['rating']
+            for title in client.get('/api/v1/titles/').json()['results']
+        }
+        assert ratings[titles[0]['id']] == 3, (
+            'Проверьте, что новый отзыв сбрасывает кеш списка произведений.'
+        )
+
+    def test_02_authenticated_not_cached(self, admin_client, admin,
+                                         user_client):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        user_client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            user_client.get(url)
+        assert context.captured_queries, (
+            'Ответы авторизованным пользователям не должны кешироваться.'
+        )
+
+    def test_03_command(self, client, admin_client, admin,
+                        django_assert_num_queries):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        tag = f'title:{titles[0]["id"]}:reviews'
+        client.get(url)
+        out = StringIO()
+        call_command('response_cache', tag, stdout=out)
+        assert out.getvalue().startswith(f'{tag}\t')
+
+        call_command('response_cache', tag, '--purge', stdout=StringIO())
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        assert context.captured_queries, (
+            'Проверьте, что команда response_cache --purge сбрасывает '
+            'ответы с тегом.'
+        )
+        with django_assert_num_queries(0):
+            client.get(url)
+
+    def test_04_title_delete_purges_reviews(self, client):
+        from reviews.models import Category, Title
+
+        title = Title.objects.create(
+            name='Произведение', year=2000,
+            category=Category.objects.create(name='Фильм', slug='film')
+        )
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.pk)
+        client.get(url)
+        assert client.get(url).json()['count'] == 0
+        title.delete()
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что удаление произведения без отзывов сбрасывает '
+            'кеш списка его отзывов.'
+        )
@@ -0,0 +1,60 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16WarmCache:
+
+    def test_01_warm_cache(self, client, admin_client, admin,
+                           django_assert_num_queries):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        out = StringIO()
+        call_command(
+            'warm_cache', '--workers', '2', '--host', 'testserver',
+            stdout=out
+        )
+        report = out.getvalue()
+        assert 'с ошибкой: 0' in report, report
+        assert f'/api/v1/titles/{titles[0]["id"]}/' in report
+        assert '/api/v1/titles/?genre=horror' in report
+        assert '/api/v1/titles/top/' not in report, (
+            'Рейтинг не кешируется, прогревать его не нужно.'
+        )
+        for url in (
+            '/api/v1/titles/',
+            '/api/v1/titles/?genre=horror',
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            '/api/v1/categories/',
+        ):
+            with django_assert_num_queries(0):
+                response = client.get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что warm_cache сохраняет ответ на `{url}`.'
+            )
+
+    def test_02_file_cache_culls_every_nth_write(self, tmp_path,
+                                                 monkeypatch):
+        from reviews.cache_backends import FileBasedCache
+
+        cache = FileBasedCache(str(tmp_path), {
+            'OPTIONS': {'MAX_ENTRIES': 2, 'CULL_EVERY': 3}
+        })
+        scans = []
+        list_cache_files = cache._list_cache_files
+
+        def counted():
+            scans.append(1)
+            return list_cache_files()
+
+        monkeypatch.setattr(cache, '_list_cache_files', counted)
+        for number in range(6):
+            cache.set(f'key-{number}', number)
+        assert len(scans) == 2, (
+            'Проверьте, что файловый кеш просматривает каталог только на '
+            'каждой CULL_EVERY-й записи.'
+        )
+        assert len(list_cache_files()) < 6
@@ -0,0 +1,81 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments
+
+
+def parent_lookups(context, table):
+    """Загрузки объекта целиком; счетчики рейтинга читаются отдельно."""
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith(f'SELECT "{table}"."id"')
+        and f'FROM "{table}" WHERE' in query['sql']
+        and f'"{table}"."id" =' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17ParentLookups:
+
+    def test_01_parent_loaded_once(self, admin_client, admin, user,
+                                   user_client):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'Да', 'score': 7})
+        assert response.status_code == HTTPStatus.CREATED
+        assert len(parent_lookups(context, 'reviews_title')) == 1, (
+            'Проверьте, что при создании отзыва произведение загружается '
+            'один раз за запрос.'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                f'{url}{reviews[0]["id"]}/comments/', data={'text': 'Да'}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert len(parent_lookups(context, 'reviews_review')) == 1, (
+            'Проверьте, что при создании комментария отзыв загружается '
+            'один раз за запрос.'
+        )
+
+    def test_02_lists_skip_parent(self, admin_client, admin):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        for list_url, table in (
+            (url, 'reviews_title'),
+            (f'{url}{reviews[0]["id"]}/comments/', 'reviews_review'),
+        ):
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.get(list_url)
+            assert response.json()['results']
+            assert not parent_lookups(context, table), (
+                f'Проверьте, что GET-запрос к `{list_url}` не загружает '
+                'родительский объект отдельным запросом.'
+            )
+
+    def test_03_missing_parent(self, admin_client, admin):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        empty_url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        response = admin_client.get(empty_url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['results'] == []
+        for url in (
+            '/api/v1/titles/9999/reviews/',
+            f'/api/v1/titles/9999/reviews/{reviews[0]["id"]}/comments/',
+            f'{empty_url}{reviews[0]["id"]}/comments/',
+        ):
+            assert admin_client.get(url).status_code == (
+                HTTPStatus.NOT_FOUND
+            ), (
+                f'Проверьте, что GET-запрос к `{url}` для несуществующего '
+                'родительского объекта возвращает ответ со статусом 404.'
+            )
@@ -0,0 +1,96 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def user_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "reviews_yamdbuser"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18AuthCache:
+
+    ME_URL = '/api/v1/users/me/'
+    USERS_URL = '/api/v1/users/'
+
+    def test_01_user_from_cache(self, user_client):
+        user_client.get(self.ME_URL)
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(self.ME_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert len(user_queries(context)) == 1, (
+            'Проверьте, что пользователь из токена берется из кеша и '
+            'повторный запрос читает из таблицы пользователей только '
+            'профиль.'
+        )
+
+    def test_02_role_change(self, admin_client, user, user_client):
+        assert user_client.get(self.USERS_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+        response = admin_client.patch(
+            f'{self.USERS_URL}{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get(self.USERS_URL).status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение роли пользователя сразу сбрасывает '
+            'его запись в кеше аутентификации.'
+        )
+
+    def test_03_self_update(self, user_client):
+        user_client.get(self.ME_URL)
+        response = user_client.patch(self.ME_URL, data={'bio': 'Новое'})
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get(self.ME_URL).json()['bio'] == 'Новое'
+
+    def test_04_deactivated_and_deleted(self, admin_client, user, user_client,
+                                        moderator, moderator_client):
+        user_client.get(self.ME_URL)
+        moderator_client.get(self.ME_URL)
+        user.is_active = False
+        user.save()
+        assert user_client.get(self.ME_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что деактивация пользователя сбрасывает кеш.'
+        admin_client.delete(f'{self.USERS_URL}{moderator.username}/')
+        assert moderator_client.get(self.ME_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что удаление пользователя сбрасывает кеш.'
+
+    def test_05_minimal_entry(self, user, user_client):
+        from django.core.cache import caches
+
+        from api.authentication import user_cache_key
+
+        user_client.get(self.ME_URL)
+        entry = caches['users'].get(user_cache_key(user.pk))
+        assert set(entry) == {
+            'id', 'username', 'role', 'is_superuser', 'is_active', 'version'
+        }, (
+            'Проверьте, что в кеше аутентификации хранятся только поля, '
+            'нужные для проверки прав, без пароля и личных данных.'
+        )
+
+    def test_06_change_during_miss(self, user, user_client, monkeypatch):
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+
+        get_user = JWTAuthentication.get_user
+
+        def change_after_read(self, validated_token):
+            loaded = get_user(self, validated_token)
+            user.role = 'admin'
+            user.save()
+            return loaded
+
+        monkeypatch.setattr(JWTAuthentication, 'get_user', change_after_read)
+        user_client.get(self.ME_URL)
+        monkeypatch.undo()
+        assert user_client.get(self.USERS_URL).status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение пользователя во время чтения из базы '
+            'не оставляет в кеше устаревшую запись.'
+        )
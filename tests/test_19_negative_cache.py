@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19NegativeCache:
+
+    def test_01_missing_parents(self, admin_client, admin,
+                                django_assert_num_queries):
+        from api.cache import missing_reviews, missing_titles
+
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        urls = (
+            '/api/v1/titles/9999/reviews/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/9999/comments/',
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/',
+        )
+        for url in urls:
+            assert admin_client.get(url).status_code == HTTPStatus.NOT_FOUND
+            with django_assert_num_queries(0):
+                response = admin_client.get(url)
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что повторный GET-запрос к `{url}` отдает 404 '
+                'из кеша отсутствующих объектов.'
+            )
+        with django_assert_num_queries(0):
+            response = admin_client.post(
+                urls[0], data={'text': 'Да', 'score': 5}
+            )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert missing_titles.stats()['hits'] == 2
+        assert missing_reviews.stats()['size'] == 2
+
+    def test_02_created_object_clears_entry(self, admin_client):
+        from reviews.models import Category, Title
+
+        url = '/api/v1/titles/9999/reviews/'
+        assert admin_client.get(url).status_code == HTTPStatus.NOT_FOUND
+        Title.objects.create(
+            pk=9999, name='Новое', year=2000,
+            category=Category.objects.create(name='Фильм', slug='films')
+        )
+        assert admin_client.get(url).status_code == HTTPStatus.OK, (
+            'Проверьте, что создание объекта удаляет его из кеша '
+            'отсутствующих объектов.'
+        )
+
+    def test_03_bounded(self, settings):
+        from api.cache import NegativeCache
+
+        settings.NEGATIVE_CACHE_SIZE = 2
+        cache = NegativeCache('test', basename='test')
+        for key in (1, 2, 3):
+            cache.add(key)
+        assert 1 not in cache and 2 in cache and 3 in cache
+        assert cache.stats()['evicted'] == 1
+
+        settings.NEGATIVE_CACHE_TIMEOUT = 0
+        cache.add(4)
+        assert 4 not in cache
+        assert cache.stats()['expired'] == 1
+
+    def test_04_creation_clears_other_processes(self, admin_client):
+        from api.cache import NegativeCache
+        from reviews.models import Category, Title
+
+        # Отдельный экземпляр ведет себя как кеш другого процесса:
+        # общая у них только метка версии.
+        other_worker = NegativeCache('titles', basename='reviews')
+        other_worker.add(9999)
+        assert 9999 in other_worker
+        Title.objects.create(
+            pk=9999, name='Новое', year=2000,
+            category=Category.objects.create(name='Фильм', slug='films')
+        )
+        assert 9999 not in other_worker, (
+            'Проверьте, что создание объекта сбрасывает кеш отсутствующих '
+            'объектов во всех процессах.'
+        )
+        assert other_worker.stats()['cleared'] == 1
@@ -0,0 +1,134 @@
+import pytest
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20StaleWhileRevalidate:
+
+    @pytest.fixture
+    def expired_reviews(self, monkeypatch, client, admin_client, admin):
+        from api import mixins
+        from reviews.metrics import metrics
+        from api.views import ReviewViewSet
+
+        monkeypatch.setattr(ReviewViewSet, 'response_cache_timeout', 0)
+        metrics.clear()
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        client.get(url)
+        threads = []
+        original = mixins.revalidate_response
+
+        def revalidate(*args):
+            threads.append(original(*args))
+            return threads[-1]
+
+        monkeypatch.setattr(mixins, 'revalidate_response', revalidate)
+        yield url, reviews, threads
+        for thread in threads:
+            thread.join(5)
+
+    def test_01_stale_served_while_revalidating(self, client,
+                                                expired_reviews):
+        from reviews.metrics import metrics
+        from reviews.models import Review
+
+        url, reviews, threads = expired_reviews
+        # Изменение в обход сигналов: тег не сбрасывается.
+        Review.objects.filter(pk=reviews[0]['id']).update(text='Новый')
+        stale = client.get(url).json()['results'][0]['text']
+        assert stale == reviews[0]['text'], (
+            'Проверьте, что истекшая запись кеша отдается, пока ответ '
+            'пересобирается в фоне.'
+        )
+        assert len(threads) == 1
+        threads[0].join(5)
+        assert client.get(url).json()['results'][0]['text'] == 'Новый', (
+            'Проверьте, что фоновая пересборка обновляет запись кеша.'
+        )
+        snapshot = metrics.snapshot()
+        assert snapshot['counters']['responses', 'reviews', 'stale_served'] == 2
+        assert snapshot['timings']['responses', 'reviews', 'revalidation_ms'][0] >= 1
+
+    def test_02_single_flight(self, client, monkeypatch, expired_reviews):
+        from api import mixins
+
+        url, _, _ = expired_reviews
+        calls = []
+        monkeypatch.setattr(
+            mixins, 'revalidate_response', lambda *args: calls.append(args)
+        )
+        for _ in range(3):
+            client.get(url)
+        assert len(calls) == 1, (
+            'Проверьте, что истекшую запись пересобирает один процесс.'
+        )
+
+    def test_03_purge_is_not_stale(self, client, admin_client, user_client,
+                                   expired_reviews):
+        url, _, threads = expired_reviews
+        user_client.post(url, data={'text': 'Да', 'score': 7})
+        assert client.get(url).json()['count'] == 2, (
+            'Проверьте, что сброс тега не отдает устаревшую запись.'
+        )
+        assert not threads
+
+    def test_04_errors_logged(self, client, caplog, monkeypatch,
+                              expired_reviews):
+        from api.views import ReviewViewSet
+        from reviews.metrics import metrics
+
+        url, _, threads = expired_reviews
+
+        def broken(self, request, *args, **kwargs):
+            raise RuntimeError('Сбой')
+
+        monkeypatch.setattr(ReviewViewSet, 'list', broken)
+        with caplog.at_level('ERROR', logger='api.cache'):
+            client.get(url)
+            threads[0].join(5)
+        assert any(
+            record.exc_info and record.exc_info[0] is RuntimeError
+            for record in caplog.records
+        ), 'Проверьте, что ошибка фоновой пересборки пишется в лог.'
+        snapshot = metrics.snapshot()
+        assert snapshot['counters'][
+            'responses', 'reviews', 'revalidation_errors'
+        ] == 1
+
+    def test_05_lock_add_is_atomic(self, monkeypatch, tmp_path):
+        import threading
+        import time
+
+        from django.core.cache.backends import filebased
+
+        from reviews.cache_backends import FileBasedCache
+
+        has_key = filebased.FileBasedCache.has_key
+
+        def slow_has_key(self, *args, **kwargs):
+            # Окно между проверкой и записью, как у параллельных процессов.
+            found = has_key(self, *args, **kwargs)
+            time.sleep(0.05)
+            return found
+
+        monkeypatch.setattr(filebased.FileBasedCache, 'has_key', slow_has_key)
+        # Отдельный бэкенд на поток - как в разных процессах.
+        stores = [FileBasedCache(str(tmp_path), {}) for _ in range(5)]
+        added = []
+        threads = [
+            threading.Thread(
+                target=lambda store=store: added.append(
+                    store.add('lock', True, 30)
+                )
+            )
+            for store in stores
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        assert added.count(True) == 1, (
+            'Проверьте, что блокировку пересборки берет один процесс.'
+        )
@@ -0,0 +1,105 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_reviews
+
+METRICS_URL = '/api/v1/cache-metrics/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21CacheMetrics:
+
+    def test_01_endpoint(self, client, user_client, admin_client, admin):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        for _ in range(2):
+            client.get('/api/v1/titles/')
+            admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/reviews/')
+
+        assert client.get(METRICS_URL).status_code == HTTPStatus.UNAUTHORIZED
+        assert user_client.get(METRICS_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+        response = admin_client.get(METRICS_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{METRICS_URL}` доступен администратору.'
+        )
+        data = response.json()
+        responses = data['layers']['responses']['titles']
+        assert responses['hits'] >= 1 and responses['misses'] >= 1
+        assert 0 < responses['hit_ratio'] < 1
+        assert responses['render_ms']['count'] >= 1
+        assert responses['bytes_written'] > 0
+        assert data['layers']['representations']['titles']['misses'] >= 1
+        assert data['layers']['users']['reviews']['hits'] >= 1
+        assert data['layers']['catalog']['genres']['hits'] >= 1
+        assert data['backends']['responses']['entries'] >= 1
+        assert 'evicted' in data['backends']['default']
+
+    def test_02_command_and_evictions(self, client):
+        from reviews.cache_backends import LocMemCache
+
+        cache = LocMemCache('test-evictions', {
+            'METRICS_NAME': 'evictions',
+            'OPTIONS': {'MAX_ENTRIES': 2, 'CULL_FREQUENCY': 2},
+        })
+        for key in range(5):
+            cache.set(key, key)
+        client.get('/api/v1/genres/')
+        out = StringIO()
+        call_command('cache_metrics', stdout=out)
+        report = out.getvalue()
+        assert 'responses' in report and 'genres: ' in report
+
+        out = StringIO()
+        call_command('cache_metrics', '--json', stdout=out)
+        assert '"evicted"' in out.getvalue()
+        from reviews.metrics import metrics
+
+        assert metrics.snapshot()['counters'][
+            'backend', 'evictions', 'evicted'
+        ] >= 1, 'Проверьте учет вытесненных записей бэкенда кеша.'
+
+    def test_03_cull_does_not_publish(self, settings, monkeypatch):
+        import threading
+
+        from django.core.cache import caches
+
+        from reviews.metrics import metrics
+
+        settings.METRICS_PUBLISH_INTERVAL = 0
+        cache = caches['default']
+        monkeypatch.setattr(cache, '_max_entries', 2)
+        thread = threading.Thread(
+            target=lambda: [cache.set(f'cull-{key}', key) for key in range(5)],
+            daemon=True
+        )
+        thread.start()
+        thread.join(5)
+        assert not thread.is_alive(), (
+            'Проверьте, что вытеснение записей не публикует метрики под '
+            'блокировкой бэкенда кеша.'
+        )
+        assert metrics.snapshot()['counters'][
+            'backend', 'default', 'evicted'
+        ] >= 1
+
+    def test_04_processes_expire(self, settings):
+        from time import time
+
+        from django.core.cache import caches
+
+        from reviews.metrics import PROCESSES_KEY, collect, metrics
+
+        store = caches[settings.METRICS_CACHE]
+        store.set(PROCESSES_KEY, {
+            'metrics:process:gone:1': time() - settings.METRICS_TIMEOUT,
+        }, None)
+        metrics.publish()
+        assert set(store.get(PROCESSES_KEY)) == {metrics.process_key}, (
+            'Проверьте, что процессы, давно не публиковавшие метрики, '
+            'удаляются из списка процессов.'
+        )
+        assert collect()['processes'] == 1
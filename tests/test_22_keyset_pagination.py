@@ -0,0 +1,155 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+REVIEWS_COUNT = 23
+
+
+def create_title_reviews(count=REVIEWS_COUNT):
+    """Произведение с count отзывами разных авторов."""
+    from django.contrib.auth import get_user_model
+    from reviews.models import Category, Review, Title
+
+    User = get_user_model()
+    title = Title.objects.create(
+        name='Произведение', year=2000,
+        category=Category.objects.create(name='Фильм', slug='film')
+    )
+    for number in range(count):
+        Review.objects.create(
+            title=title, text=f'Отзыв {number}', score=5,
+            author=User.objects.create(
+                username=f'keyset-{number}', email=f'keyset-{number}@fake.fake'
+            )
+        )
+    return title
+
+
+def follow(client, url, key='next'):
+    """id записей всех страниц по ссылкам key."""
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        ids.extend(item['id'] for item in data['results'])
+        url = data[key]
+    return ids
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22KeysetPagination:
+
+    def test_01_reviews_follow_cursor(self, client):
+        from reviews.models import Review
+
+        title = create_title_reviews()
+        url = f'/api/v1/titles/{title.pk}/reviews/?cursor='
+        response = client.get(url)
+        data = response.json()
+        assert set(data) == {'next', 'previous', 'results'}, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит поля '
+            '`next`, `previous` и `results`.'
+        )
+        assert data['previous'] is None
+        expected = list(
+            Review.objects.filter(title=title).order_by(
+                'pub_date', 'id'
+            ).values_list('id', flat=True)
+        )
+        assert follow(client, url) == expected, (
+            'Проверьте, что переход по ссылкам `next` возвращает все '
+            'отзывы в порядке (pub_date, id) без повторов.'
+        )
+
+    def test_02_previous_links(self, client):
+        title = create_title_reviews()
+        url = f'/api/v1/titles/{title.pk}/reviews/?cursor='
+        forward = follow(client, url)
+        while True:
+            data = client.get(url).json()
+            if not data['next']:
+                break
+            url = data['next']
+        last_page = [item['id'] for item in data['results']]
+        backward = follow(client, data['previous'], key='previous')
+        pages = forward[:-len(last_page)]
+        assert sorted(backward) == sorted(pages), (
+            'Проверьте, что переход по ссылкам `previous` с последней '
+            'страницы возвращает все предыдущие отзывы.'
+        )
+
+    def test_03_insert_between_pages(self, client, admin):
+        from reviews.models import Review
+
+        title = create_title_reviews()
+        url = f'/api/v1/titles/{title.pk}/reviews/?cursor='
+        first = client.get(url).json()
+        Review.objects.filter(pk=first['results'][0]['id']).delete()
+        Review.objects.create(title=title, author=admin, text='Новый', score=1)
+        seen = [item['id'] for item in first['results']]
+        seen.extend(follow(client, first['next']))
+        assert len(seen) == len(set(seen)), (
+            'Проверьте, что изменения между запросами страниц не приводят '
+            'к повторам отзывов.'
+        )
+        assert set(
+            Review.objects.filter(title=title).values_list('id', flat=True)
+        ) <= set(seen), (
+            'Проверьте, что изменения между запросами страниц не приводят '
+            'к пропуску отзывов.'
+        )
+
+    def test_04_no_offset(self, client):
+        title = create_title_reviews()
+        url = f'/api/v1/titles/{title.pk}/reviews/?cursor='
+        url = client.get(url).json()['next']
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert not any(
+            'OFFSET' in query['sql'] for query in context.captured_queries
+        ), (
+            'Проверьте, что страница по курсору выбирается без OFFSET.'
+        )
+
+    def test_05_invalid_cursor(self, client):
+        title = create_title_reviews(1)
+        url = f'/api/v1/titles/{title.pk}/reviews/?cursor=invalid'
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+            f'Проверьте, что GET-запрос к `{url}` с неверным курсором '
+            'возвращает ответ со статусом 404.'
+        )
+
+    def test_06_page_number_unchanged(self, client):
+        title = create_title_reviews()
+        data = client.get(f'/api/v1/titles/{title.pk}/reviews/').json()
+        assert data['count'] == REVIEWS_COUNT, (
+            'Проверьте, что без параметра `cursor` список отзывов '
+            'по-прежнему выводится по номерам страниц.'
+        )
+
+    def test_07_comments_follow_cursor(self, client, admin):
+        from reviews.models import Comment
+
+        title = create_title_reviews(1)
+        review = title.reviews.get()
+        for number in range(12):
+            Comment.objects.create(
+                review=review, author=admin, text=f'Комментарий {number}'
+            )
+        url = (
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+            '?cursor='
+        )
+        expected = list(
+            review.comments.order_by('pub_date', 'id').values_list(
+                'id', flat=True
+            )
+        )
+        assert follow(client, url) == expected, (
+            'Проверьте, что переход по ссылкам `next` возвращает все '
+            'комментарии в порядке (pub_date, id) без повторов.'
+        )
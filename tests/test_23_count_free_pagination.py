@@ -0,0 +1,139 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def count_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'COUNT(' in query['sql']
+    ]
+
+
+@pytest.fixture
+def titles():
+    from reviews.models import Category, Title
+
+    category = Category.objects.create(name='Фильм', slug='film')
+    return Title.objects.bulk_create(
+        Title(name=f'Произведение {number:02}', year=2000, category=category)
+        for number in range(12)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23CountFreePagination:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_exact_count_once(self, admin_client, titles):
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get(self.TITLES_URL)
+        assert response.json()['count'] == len(titles)
+        assert len(count_queries(context)) == 1, (
+            'Проверьте, что количество записей для пагинации берется из '
+            'валидаторов ETag, а не считается повторно.'
+        )
+
+    def test_02_count_none(self, admin_client, titles):
+        url = f'{self.TITLES_URL}?count=none'
+        pages = []
+        while url:
+            response = admin_client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что с параметром `count=none` ответ не '
+                'содержит количества записей.'
+            )
+            pages.append([item['name'] for item in data['results']])
+            url = data['next']
+        names = [name for page in pages for name in page]
+        assert names == sorted(title.name for title in titles), (
+            'Проверьте, что с параметром `count=none` переход по ссылкам '
+            '`next` возвращает все записи без повторов.'
+        )
+        assert len(pages) == 3
+        response = admin_client.get(f'{self.TITLES_URL}?count=none&page=4')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что страница после последней возвращает 404.'
+        )
+
+    def test_03_count_none_skips_count(self, user_client, titles):
+        # Рейтинг не вычисляет валидаторы, COUNT делала только пагинация.
+        url = '/api/v1/titles/top/?count=none'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert not count_queries(context), (
+            f'Проверьте, что GET-запрос к `{url}` не выполняет COUNT.'
+        )
+
+    def test_04_count_approximate(self, admin_client, titles):
+        from reviews.models import Title
+
+        url = f'{self.TITLES_URL}?count=approximate'
+        data = admin_client.get(url).json()
+        assert data['count'] == len(titles)
+        assert data['count_approximate'] is True, (
+            'Проверьте, что приблизительное количество помечено полем '
+            '`count_approximate`.'
+        )
+        Title.objects.filter(pk=titles[0].pk).delete()
+        data = admin_client.get(url).json()
+        assert data['count'] == len(titles), (
+            'Проверьте, что приблизительное количество берется из кеша.'
+        )
+        assert len(data['results']) == 5
+
+    def test_05_limit_offset(self, admin_client):
+        from reviews.models import Genre
+
+        Genre.objects.bulk_create(
+            Genre(name=f'Жанр {number}', slug=f'genre-{number}')
+            for number in range(7)
+        )
+        url = '/api/v1/genres/?count=none&limit=5'
+        data = admin_client.get(url).json()
+        assert 'count' not in data
+        assert len(data['results']) == 5
+        assert data['previous'] is None
+        data = admin_client.get(data['next']).json()
+        assert len(data['results']) == 2
+        assert data['next'] is None, (
+            'Проверьте, что с параметром `count=none` у последней страницы '
+            'limit/offset нет ссылки `next`.'
+        )
+        assert data['previous']
+
+    @pytest.mark.parametrize('url', (
+        '/api/v1/titles/?count=none',
+        '/api/v1/titles/?count=approximate',
+        '/api/v1/genres/?count=none&limit=5',
+    ))
+    def test_06_validators_skip_count(self, admin_client, titles, url):
+        from reviews.models import Title
+
+        admin_client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert not count_queries(context), (
+            f'Проверьте, что валидаторы ETag GET-запроса к `{url}` не '
+            'выполняют COUNT.'
+        )
+        cached = admin_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert cached.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным ETag '
+            'возвращает ответ со статусом 304.'
+        )
+        if url.startswith(self.TITLES_URL):
+            Title.objects.order_by('name').first().delete()
+            response = admin_client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что удаление записи страницы меняет ETag.'
+            )
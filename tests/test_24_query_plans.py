@@ -0,0 +1,140 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments
+
+LIST_URLS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/?genre={genre}',
+    '/api/v1/titles/?category={category}',
+    '/api/v1/titles/?year={year}',
+    '/api/v1/titles/?name={name}',
+    '/api/v1/titles/?ordering=-rating',
+    '/api/v1/titles/?ordering=-review_count',
+    '/api/v1/titles/top/',
+    '/api/v1/titles/top/?genre={genre}',
+    '/api/v1/categories/',
+    '/api/v1/genres/',
+    '/api/v1/users/',
+    '/api/v1/titles/{title_id}/reviews/',
+    '/api/v1/titles/{title_id}/reviews/?cursor=',
+    '/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+    '/api/v1/titles/{title_id}/reviews/{review_id}/comments/?cursor=',
+)
+
+# Полный просмотр таблицы: SCAN x (SQLite 3.36+) или SCAN TABLE x.
+FULL_SCAN = re.compile(r'SCAN (TABLE )?(?P<table>\w+)( AS \w+)?$')
+# Справочники жанров и категорий малы и целиком лежат в памяти процессов
+# (reviews.registry): агрегат валидаторов по ним просматривает таблицу.
+SCAN_ALLOWED = ('reviews_category', 'reviews_genre')
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(sql):
+    """
+    Полный просмотр таблицы в запросе с условием или в агрегате
+    валидаторов списка и сортировка всей таблицы ради одной страницы.
+    """
+    filtered = ' WHERE ' in sql
+    aggregate = sql.startswith('SELECT MAX(')
+    problems = []
+    for line in query_plan(sql):
+        scan = FULL_SCAN.match(line)
+        if (
+            scan and (filtered or aggregate)
+            and scan['table'] not in SCAN_ALLOWED
+            or not filtered and line.startswith('USE TEMP B-TREE')
+        ):
+            problems.append(line)
+    return problems
+
+
+@pytest.fixture
+def list_urls(admin_client, admin):
+    from reviews.models import Title
+
+    _, reviews, titles = create_comments(admin_client, {admin: admin_client})
+    title = Title.objects.get(pk=titles[0]['id'])
+    params = {
+        'title_id': title.pk,
+        'review_id': reviews[0]['id'],
+        'genre': title.genre.first().slug,
+        'category': title.category.slug,
+        'year': title.year,
+        'name': title.name[:3],
+    }
+    return [url.format(**params) for url in LIST_URLS]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24QueryPlans:
+
+    def test_01_no_full_scans(self, admin_client, list_urls):
+        for url in list_urls:
+            with CaptureQueriesContext(connection) as context:
+                admin_client.get(url)
+            for query in context.captured_queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                problems = plan_problems(query['sql'])
+                assert not problems, (
+                    f'Проверьте, что запросы GET-запроса к `{url}` '
+                    f'используют индексы: {problems} в {query["sql"]}'
+                )
+
+    @pytest.mark.parametrize('url, index', (
+        ('/api/v1/titles/', 'title_name_idx'),
+        ('/api/v1/titles/?genre={genre}', 'title_genre_genre_title_idx'),
+        ('/api/v1/titles/{title_id}/reviews/', 'review_title_pub_date_idx'),
+        (
+            '/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+            'comment_review_pub_date_idx'
+        ),
+    ))
+    def test_02_hot_path_indexes(self, admin_client, admin, url, index):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        url = url.format(
+            genre='drama', title_id=titles[0]['id'],
+            review_id=reviews[0]['id']
+        )
+        with CaptureQueriesContext(connection) as context:
+            admin_client.get(url)
+        plans = [
+            line for query in context.captured_queries
+            for line in query_plan(query['sql'])
+        ]
+        assert any(index in line for line in plans), (
+            f'Проверьте, что GET-запрос к `{url}` использует индекс '
+            f'`{index}`.'
+        )
+
+    def test_03_author_reviews(self, admin):
+        from reviews.models import Review
+
+        reviews = Review.objects.filter(author=admin).order_by('-pub_date')
+        plan = ' '.join(query_plan(str(reviews[:5].query)))
+        assert 'review_author_pub_date_idx' in plan, (
+            'Проверьте, что отзывы пользователя по дате выбираются по '
+            'индексу (author, pub_date).'
+        )
+        assert 'TEMP B-TREE' not in plan
+
+    def test_04_full_scan_formats(self):
+        for line in ('SCAN reviews_title', 'SCAN TABLE reviews_title'):
+            assert FULL_SCAN.match(line)['table'] == 'reviews_title', (
+                'Проверьте, что полный просмотр таблицы распознается в '
+                'планах старых и новых версий SQLite.'
+            )
+        assert not FULL_SCAN.match(
+            'SCAN reviews_title USING COVERING INDEX title_updated_at_idx'
+        )
@@ -0,0 +1,70 @@
+import pytest
+
+AUTHORS_COUNT = 5
+
+
+@pytest.fixture
+def review_page():
+    """Отзыв и страница отзывов и комментариев разных авторов."""
+    from django.contrib.auth import get_user_model
+    from reviews.models import Category, Comment, Review, Title
+
+    User = get_user_model()
+    authors = [
+        User.objects.create(
+            username=f'author-{number}', email=f'author-{number}@fake.fake'
+        )
+        for number in range(AUTHORS_COUNT)
+    ]
+    title = Title.objects.create(
+        name='Произведение', year=2000,
+        category=Category.objects.create(name='Фильм', slug='film')
+    )
+    reviews = [
+        Review.objects.create(
+            title=title, author=author, text='Отзыв', score=5
+        )
+        for author in authors
+    ]
+    comments = [
+        Comment.objects.create(
+            review=reviews[0], author=author, text='Комментарий'
+        )
+        for author in authors
+    ]
+    return title, reviews[0], comments[0]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25AuthorQueries:
+
+    def test_01_lists(self, client, django_assert_num_queries, review_page):
+        title, review, _ = review_page
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        for url in (reviews_url, f'{reviews_url}{review.pk}/comments/'):
+            # Валидаторы ETag и страница вместе с авторами.
+            with django_assert_num_queries(2):
+                response = client.get(url)
+            results = response.json()['results']
+            assert len(results) == AUTHORS_COUNT
+            assert len({item['author'] for item in results}) == (
+                AUTHORS_COUNT
+            ), (
+                f'Проверьте, что GET-запрос к `{url}` загружает авторов '
+                'страницы тем же запросом, что и записи.'
+            )
+
+    def test_02_details(self, client, django_assert_num_queries,
+                        review_page):
+        title, review, comment = review_page
+        review_url = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/'
+        for url, author in (
+            (review_url, review.author.username),
+            (f'{review_url}comments/{comment.pk}/', comment.author.username),
+        ):
+            with django_assert_num_queries(1):
+                response = client.get(url)
+            assert response.json()['author'] == author, (
+                f'Проверьте, что GET-запрос к `{url}` загружает автора '
+                'вместе с записью.'
+            )
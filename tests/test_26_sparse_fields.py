@@ -0,0 +1,149 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.test_22_keyset_pagination import create_title_reviews, follow
+from tests.utils import create_comments
+
+
+def selected_columns(context, table):
+    """Колонки из SELECT по таблице, кроме агрегатов валидаторов."""
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith(f'SELECT "{table}"."id"')
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26SparseFields:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_titles_fields(self, client, admin_client, admin,
+                              django_assert_num_queries):
+        create_comments(admin_client, {admin: admin_client})
+        url = f'{self.TITLES_URL}?fields=id,name,year'
+        # Валидаторы ETag и страница, без запроса жанров.
+        with django_assert_num_queries(2):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        for title in response.json()['results']:
+            assert set(title) == {'id', 'name', 'year'}, (
+                f'Проверьте, что GET-запрос к `{url}` возвращает только '
+                'запрошенные поля.'
+            )
+        page_sql = selected_columns(context, 'reviews_title')[0]
+        assert '"description"' not in page_sql, (
+            f'Проверьте, что GET-запрос к `{url}` не читает колонки '
+            'незапрошенных полей.'
+        )
+
+    def test_02_titles_omit(self, client, admin_client, admin,
+                            django_assert_num_queries):
+        create_comments(admin_client, {admin: admin_client})
+        full = client.get(self.TITLES_URL).json()['results']
+        url = f'{self.TITLES_URL}?omit=genre,description'
+        with django_assert_num_queries(2):
+            response = client.get(url)
+        assert response.json()['results'] == [
+            {
+                name: value for name, value in title.items()
+                if name not in ('genre', 'description')
+            }
+            for title in full
+        ], (
+            f'Проверьте, что GET-запрос к `{url}` возвращает все поля, '
+            'кроме перечисленных в `omit`.'
+        )
+
+    def test_03_title_detail(self, client, admin_client, admin,
+                             django_assert_num_queries):
+        _, _, titles = create_comments(admin_client, {admin: admin_client})
+        detail_url = f'{self.TITLES_URL}{titles[0]["id"]}/'
+        full = client.get(detail_url).json()
+        url = f'{detail_url}?fields=name,genre'
+        # Произведение и его жанры.
+        with django_assert_num_queries(2):
+            response = client.get(url)
+        assert response.json() == {
+            'name': full['name'], 'genre': full['genre']
+        }, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает только '
+            'запрошенные поля произведения.'
+        )
+
+    def test_04_reviews_and_comments(self, client, admin_client, admin):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        for url, fields in (
+            (f'{reviews_url}?fields=id,score', {'id', 'score'}),
+            (
+                f'{reviews_url}{reviews[0]["id"]}/comments/?omit=author',
+                {'id', 'text', 'pub_date', 'review'}
+            ),
+        ):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            results = response.json()['results']
+            assert results and set(results[0]) == fields
+            assert not any(
+                'reviews_yamdbuser' in query['sql']
+                for query in context.captured_queries
+            ), (
+                f'Проверьте, что GET-запрос к `{url}` без поля `author` '
+                'не присоединяет таблицу пользователей.'
+            )
+        response = client.get(f'{reviews_url}?fields=author')
+        assert response.json()['results'][0] == {'author': admin.username}
+
+    def test_05_users(self, admin_client, admin):
+        response = admin_client.get('/api/v1/users/?fields=username,role')
+        assert response.json()['results'] == [
+            {'username': admin.username, 'role': admin.role}
+        ], (
+            'Проверьте, что список пользователей поддерживает параметр '
+            '`fields`.'
+        )
+
+    def test_06_unknown_field(self, client):
+        for url in (
+            f'{self.TITLES_URL}?fields=id,unknown',
+            f'{self.TITLES_URL}?omit=unknown',
+        ):
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что GET-запрос к `{url}` с неизвестным полем '
+                'возвращает ответ со статусом 400.'
+            )
+
+    def test_07_writes_unaffected(self, admin_client, admin):
+        _, _, titles = create_comments(admin_client, {admin: admin_client})
+        url = f'{self.TITLES_URL}{titles[0]["id"]}/?fields=id'
+        response = admin_client.patch(url, data={'year': 1990})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['year'] == 1990, (
+            'Проверьте, что параметр `fields` не влияет на запросы '
+            'на изменение.'
+        )
+
+    def test_08_keyset_cursor(self, client, django_assert_max_num_queries):
+        from reviews.models import Review
+
+        title = create_title_reviews()
+        url = f'/api/v1/titles/{title.pk}/reviews/?cursor=&fields=id,score'
+        expected = list(
+            Review.objects.filter(title=title).order_by(
+                'pub_date', 'id'
+            ).values_list('id', flat=True)
+        )
+        # Курсор читает pub_date из выборки, без догрузки по записи.
+        with django_assert_max_num_queries(10):
+            assert follow(client, url) == expected, (
+                f'Проверьте, что переход по ссылкам `next` от `{url}` '
+                'возвращает все отзывы с параметром `fields`.'
+            )